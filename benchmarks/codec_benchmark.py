@@ -0,0 +1,110 @@
+"""
+Compare JSON codecs on the hot serialization points.
+
+Run from the project root:
+
+    python -m benchmarks.codec_benchmark [--number 100000]
+"""
+
+# Standard Library
+import argparse
+import json
+from timeit import timeit
+from typing import (
+    Any,
+    Callable,
+    List,
+    Tuple,
+)
+
+# Third Party Stuff
+from prettytable import PrettyTable
+
+# My Stuff
+from core import codec
+from core.models import User
+
+# Shape of taiga_timeline_channel notification, `data` is JSON string itself
+TIMELINE_DATA = {
+    "id": 184523,
+    "event_type": "userstories.userstory.change",
+    "project_id": 42,
+    "content_type_id": 37,
+    "data": {
+        "user": {"id": 17, "name": "Vladimir Sumarokov", "username": "sumarokov"},
+        "userstory": {"id": 9011, "ref": 1288, "subject": "Закрытие актов " * 8},
+        "values_diff": {"status": ["In progress", "Done"], "assigned_to": [17, 23]},
+        "comment": "Готово, проверьте пожалуйста " * 4,
+    },
+    "created": "2024-05-14T10:21:33.120918+00:00",
+}
+PAYLOAD = json.dumps(
+    {"event_type": "timeline.created", "data": json.dumps(TIMELINE_DATA)}
+)
+
+USER = User(
+    chat_id=65310,
+    name="sumarokov_cyclist",
+    full_name="Vladimir Sumarokov",
+    bot_state="REPORTS_O",
+    bot_state_value=3,
+    last_message_id=1024,
+    report_id=7,
+)
+USER_JSON = USER.model_dump_json()
+
+
+def parse_payload(c: codec.Codec) -> Callable[[], Any]:
+    def run() -> Any:
+        payload = c.loads(PAYLOAD)
+        return c.loads(payload["data"])
+
+    return run
+
+
+def decode_user(c: codec.Codec) -> Callable[[], Any]:
+    def run() -> Any:
+        return User.model_validate(c.loads(USER_JSON))
+
+    return run
+
+
+def encode_user(c: codec.Codec) -> Callable[[], Any]:
+    def run() -> Any:
+        return c.dumps(USER.model_dump())
+
+    return run
+
+
+def cases() -> List[Tuple[str, str, Callable[[], Any]]]:
+    result: List[Tuple[str, str, Callable[[], Any]]] = []
+    codecs = [codec.make_codec("json")]
+    if codec.orjson:
+        codecs.append(codec.make_codec("orjson"))
+    for c in codecs:
+        result.append(("notification payload", c.name, parse_payload(c)))
+        result.append(("User decode", c.name, decode_user(c)))
+        result.append(("User encode", c.name, encode_user(c)))
+    result.append(
+        ("User decode", "pydantic", lambda: codec.load_model(User, USER_JSON))
+    )
+    result.append(("User encode", "pydantic", lambda: codec.dump_model(USER)))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    table = PrettyTable(["case", "codec", "µs per call"])
+    table.align = "l"
+    for case, name, run in sorted(cases()):
+        seconds = timeit(run, number=args.number)
+        table.add_row([case, name, f"{seconds / args.number * 1e6:.2f}"])
+    print(f"Configured codec: {codec.get_codec().name}")
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
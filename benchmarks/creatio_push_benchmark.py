@@ -0,0 +1,111 @@
+"""
+Push receipt tasks to local fake Creatio (tests/fake_creatio.py)
+with every push mode and OData version.
+
+Run from the project root:
+
+    python -m benchmarks.creatio_push_benchmark [--tasks 200] [--latency 0.02]
+
+Latency is added to every HTTP request and item latency to every created
+object, so the results show round trips cost of each mode. Failures
+are injected with --error-rate, they are counted in "failed" column.
+"""
+
+# Standard Library
+import argparse
+from time import perf_counter
+from uuid import uuid4
+
+# Third Party Stuff
+from prettytable import PrettyTable
+
+# My Stuff
+from core.settings import settings
+from taiga_to_bpm.creatio import Creatio
+from taiga_to_bpm.creatio_constants import ODATA_version
+from taiga_to_bpm.creatio_worker import (
+    Receipt,
+    Task,
+)
+from tests.fake_creatio import FakeCreatio
+
+MODES = ("batch", "concurrent")
+VERSIONS = (ODATA_version.v3, ODATA_version.v4)
+
+
+def make_tasks(count: int) -> list[Task]:
+    desk_guid = str(uuid4())
+    return [
+        Task(
+            id=n,
+            subject=f"Закрытие актов {n}",
+            bpm_user_guid=str(uuid4()),
+            desk_guid=desk_guid,
+            estimate=2,
+            hours=1,
+            minutes=45,
+            ref=str(n),
+            assigned_to_id=17,
+            url=f"https://taiga.example.com/project/test/task/{n}",
+            user_full_name="Vladimir Sumarokov",
+        )
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--item-latency", type=float, default=0.001)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0)
+    parser.add_argument("--batch-size", type=int, default=settings.creatio_batch_size)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.creatio_concurrency
+    )
+    args = parser.parse_args()
+
+    # settings are cached properties, so they can be overridden for the run
+    settings.creatio_rate_limit = args.rate_limit
+    settings.creatio_batch_size = args.batch_size
+    settings.creatio_concurrency = args.concurrency
+
+    table = PrettyTable(["version", "mode", "seconds", "tasks/s", "requests", "failed"])
+    table.align = "l"
+    for version in VERSIONS:
+        for mode in MODES:
+            with FakeCreatio(
+                latency=args.latency,
+                item_latency=args.item_latency,
+                error_rate=args.error_rate,
+                seed=0,
+            ) as fake:
+                creatio = Creatio(fake.url, fake.login, fake.password, version)
+                receipt = Receipt.new(str(uuid4()), creatio)
+                tasks = make_tasks(args.tasks)
+                requests_before = fake.stats["request"]
+                start = perf_counter()
+                results = receipt.add_tasks(tasks, creatio, mode)
+                seconds = perf_counter() - start
+                creatio.close()
+            table.add_row(
+                [
+                    version.name,
+                    mode,
+                    f"{seconds:.3f}",
+                    f"{len(tasks) / seconds:.0f}",
+                    fake.stats["request"] - requests_before,
+                    sum(not result.ok for result in results),
+                ]
+            )
+    print(
+        f"{args.tasks} tasks, latency {args.latency}s, "
+        f"item latency {args.item_latency}s, batch size {args.batch_size}, "
+        f"concurrency {args.concurrency}"
+    )
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
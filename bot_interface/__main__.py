@@ -1,4 +1,6 @@
-# Third Party Stuff
+# Standard Library
+import signal
+import sys
 
 # My Stuff
 from bot_interface import handlers
@@ -8,4 +10,8 @@ if __name__ == "__main__":
     print(handlers.State.COMMANDS_I.name)
     print("Bot started")
 
+    # Exit through SystemExit on SIGTERM, so atexit hooks
+    # flush queued bot_users writes and close pools
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+
     bot.infinity_polling()
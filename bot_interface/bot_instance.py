@@ -1,8 +1,7 @@
 # Standard Library
-from os import environ
+from functools import cache
 
 # Third Party Stuff
-from dotenv import load_dotenv
 from psycopg.rows import TupleRow
 from telebot import TeleBot  # type: ignore[import-untyped]
 from telebot.types import (  # type: ignore[import-untyped]
@@ -10,11 +9,23 @@ from telebot.types import (  # type: ignore[import-untyped]
     InlineKeyboardMarkup,
 )
 
-load_dotenv()
-token = environ.get("BOT_TOKEN")
-if not token:
-    raise ValueError("BOT_TOKEN environment variable not set. Check .env file")
-bot: TeleBot = TeleBot(token, parse_mode="MarkdownV2", threaded=False)
+# My Stuff
+from core.settings import settings
+
+
+@cache
+def get_bot() -> TeleBot:
+    """
+    Shared TeleBot instance, created on first use.
+    Importing `bot` from this module creates it.
+    """
+    return TeleBot(settings.bot_token, parse_mode="MarkdownV2", threaded=False)
+
+
+def __getattr__(name: str) -> TeleBot:
+    if name == "bot":
+        return get_bot()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def list_buttons(rows: list[TupleRow], callback_prefix: str) -> InlineKeyboardMarkup:
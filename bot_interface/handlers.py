@@ -5,6 +5,7 @@ All bot handlers are here
 from __future__ import annotations
 
 # Standard Library
+import json
 from enum import (
     Enum,
     auto,
@@ -25,12 +26,15 @@ from bot_interface.bot_instance import (
     list_buttons,
 )
 from bot_interface.report_generator import generate_report
+from bot_interface.utils.send_file import SendFile
 from core.models import User
 from db.db_worker import (
     execute_query,
     get_all,
     get_one,
 )
+from db.pool import pool_stats
+from db.query_stats import query_stats
 
 # from taiga_to_bpm.creatio_worker import create_receipt
 
@@ -63,6 +67,7 @@ class Command(Enum):
     EDIT_REPORTS_QUERY = 4
     EDIT_REPORTS_PERMISSIONS_ADD = 5
     EDIT_REPORTS_PERMISSIONS_REMOVE = 6
+    DB_STATS = 7
 
 
 def router(user: User) -> Message:
@@ -88,6 +93,8 @@ def router(user: User) -> Message:
                     return topay_closer.router(user)
                 case Command.EDIT_REPORTS.value:
                     return edit_reports(user)
+                case Command.DB_STATS.value:
+                    return show_db_stats(user)
                 case _:
                     return bot.send_message(
                         chat_id=user.chat_id,
@@ -141,7 +148,7 @@ def command_reports(message: Message) -> Message:
             name=message.from_user.username,
             full_name=message.from_user.full_name,
         )
-        user.save_to_redis()
+        user.save_fields("name", "full_name")
 
     user.bot_state = State.REPORTS_I.name
     return router(user)
@@ -177,6 +184,7 @@ def command_start(message: Message) -> Message:
         full_name=message.from_user.full_name,
         bot_state=State.REPORTS_I.name,
     )
+    # /start begins a new session, so the whole user is replaced
     user.save_to_redis()
     user.save_to_db()
     return router(user)
@@ -203,7 +211,7 @@ def command_commands(message: Message) -> Message:
             name=message.from_user.username,
             full_name=message.from_user.full_name,
         )
-        user.save_to_redis()
+        user.save_fields("name", "full_name")
     user.bot_state = State.COMMANDS_I.name
     return router(user)
 
@@ -220,7 +228,7 @@ WHERE
     ;
         """
     args = {"chat_id": chat_id}
-    reports = get_all(query, args)
+    reports = get_all(query, args, replica=True)
     if not reports:
         txt = f"You have no allowed reports\nsend you id to administrator:\n`{chat_id}`"
         return bot.send_message(
@@ -281,7 +289,7 @@ def edit_reports(user: User) -> Message:
         )
     keyboard = list_buttons(reports, "main#")
     user.bot_state = State.COMMAND_EDIT_REPORTS.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value")
     return bot.send_message(user.chat_id, "Редактировать отчет", reply_markup=keyboard)
 
 
@@ -321,7 +329,7 @@ def edit_report(user: User) -> Message:
     keyboard.add(button_query)
 
     user.bot_state = State.COMMAND_EDIT_REPORT.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value", "report_id")
     txt = f"""
 Отчет: `{report_name}`
 ```sql
@@ -359,7 +367,7 @@ def edit_report_query(user: User) -> Message:
     report_name = report[0]
     report_query = report[1]
     user.bot_state = State.COMMAND_EDIT_REPORTS_QUERY.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value", "report_id")
     txt = f"""Редактировать запрос
 Отчет: `{report_name}`
 
@@ -379,19 +387,18 @@ def edit_report_query(user: User) -> Message:
 
 
 def edit_report_query_next_step(message: Message) -> Message:
-    user = User.get_from_redis(message.from_user.id)
-    if not user:
+    report_id = User.get_field(message.from_user.id, "report_id")
+    if not report_id:
         return bot.send_message(
             chat_id=message.from_user.id,
             text="Error: conversation not found, restart your command",
         )
-    report_id = user.report_id
     query = """
     UPDATE bot_reports
     SET report_query = %(report_query)s
     WHERE id = %(report_id)s
     """
-    args = {"report_query": message.text, "report_id": report_id}
+    args = {"report_query": message.text, "report_id": int(report_id)}
     execute_query(query, args)
     return bot.send_message(
         chat_id=message.chat.id,
@@ -454,7 +461,7 @@ def edit_report_permissions(user: User) -> Message:
     keyboard.add(button_add)
     keyboard.add(button_remove)
     user.bot_state = State.COMMAND_EDIT_REPORTS_PERMISSIONS.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value")
     return bot.send_message(
         user.chat_id,
         f"""
@@ -518,7 +525,7 @@ def edit_report_permissions_add(user: User) -> Message:
     keyboard = list_buttons(unallowed_roles, "main#")
 
     user.bot_state = State.COMMAND_EDIT_REPORTS_PERMISSIONS_ADD.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value")
     return bot.send_message(
         user.chat_id,
         f"""
@@ -569,7 +576,7 @@ def edit_report_permissions_remove(user: User) -> Message:
         )
     keyboard = list_buttons(allowed_roles, "main#")
     user.bot_state = State.COMMAND_EDIT_REPORTS_PERMISSIONS_REMOVE.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value")
     return bot.send_message(
         user.chat_id,
         f"""
@@ -618,3 +625,19 @@ def edit_report_permissions_remove_role(user: User) -> Message:
         chat_id=user.chat_id,
         text="Permission removed",
     )
+
+
+def show_db_stats(user: User) -> Message:
+    """
+    Send query latency statistics and connection pool stats as a file.
+    Available to roles with DB_STATS command in bot_roles_commands.
+    """
+    stats = (
+        f"{query_stats.report()}\n\n"
+        f"Pools:\n{json.dumps(pool_stats(), indent=2)}"
+    )
+    SendFile(bot, user.chat_id).text(stats)
+    return bot.send_message(
+        chat_id=user.chat_id,
+        text="Статистика запросов",
+    )
@@ -16,9 +16,8 @@ from bot_interface.bot_instance import (
 from bot_interface.pdf_output import make_pdf_report
 from core.models import User
 from db.db_worker import (
-    get_all,
     get_one,
-    query_columns,
+    query_result,
 )
 
 
@@ -59,7 +58,7 @@ def generate_report(user: User) -> Message:
     WHERE id = %(report_id)s
     """
     args = {"report_id": report_id}
-    report_query_row = get_one(query, args)
+    report_query_row = get_one(query, args, replica=True)
     if not report_query_row:
         return bot.send_message(
             chat_id=chat_id,
@@ -70,18 +69,17 @@ def generate_report(user: User) -> Message:
     report_engine: str = report_query_row[2]
     slug: str = report_query_row[3]
 
-    columns = query_columns(report_query)
-
-    report_result_rows = get_all(report_query)
-    if not report_result_rows:
+    report_result = query_result(report_query, replica=True)
+    if not report_result.rows:
         return bot.send_message(chat_id, "No data")
+    columns = report_result.columns
 
     # convert Tuples collection to list
     # result_list = [list(row) for row in report_result_rows]
 
     # convert cells to strings and result to list of lists
     result_list: list[list[str]] = []
-    for row_tuple in report_result_rows:
+    for row_tuple in report_result.rows:
         list_row = list(row_tuple)
         for i, cell in enumerate(list_row):
             if cell:
@@ -21,12 +21,14 @@ from bot_interface.bot_instance import (
 )
 from core.models import User
 from db.db_worker import (
-    execute_query,
+    execute_pipeline,
     get_all,
 )
 from taiga_to_bpm.creatio_worker import (
     Receipt,
+    creatio_connection,
     get_tasks,
+    push_errors,
 )
 
 from .utils.send_file import SendFile
@@ -101,7 +103,8 @@ def create_new_receipt(user: User) -> Message:
     try:
         tasks = get_tasks(project_id)
         desk_guid = tasks[0].desk_guid
-        receipt = Receipt.new(desk_guid)
+        creatio = creatio_connection()
+        receipt = Receipt.open_for_project(project_id, desk_guid, creatio)
         bot.send_message(
             chat_id=user.chat_id,
             text="Receipt created, adding tasks to it",
@@ -115,12 +118,13 @@ def create_new_receipt(user: User) -> Message:
         )
 
     try:
-        for task in tasks:
-            task.push_to_creatio(receipt.guid)
-            bot.send_message(
-                chat_id=user.chat_id,
-                text=f"Task {task.id} added to receipt",
-            )
+        errors = push_errors(receipt.add_tasks(tasks, creatio))
+        if errors:
+            raise ValueError(errors)
+        bot.send_message(
+            chat_id=user.chat_id,
+            text=f"{len(tasks)} tasks added to receipt",
+        )
     except Exception as e:
         send_file.text(traceback.format_exc())
         txt = replace_reserved_characters(str(e))
@@ -143,7 +147,9 @@ AND t.status_id = ps.topay_status_id
 AND t.project_id = %(project_id)s
     """
     args = {"project_id": project_id}
-    execute_query(query, args)
+    # receipt is finished in the same transaction, so retry after
+    # failure above resumes it and finished receipt is never resumed
+    execute_pipeline([(query, args), receipt.finish_query()])
     txt = replace_reserved_characters(receipt.url)
     return bot.send_message(
         chat_id=user.chat_id,
@@ -163,7 +169,7 @@ FROM projects_project
 ORDER BY name
 ;
     """
-    projects = get_all(query)
+    projects = get_all(query, replica=True)
     if not projects:
         return bot.send_message(
             chat_id=user.chat_id,
@@ -171,7 +177,7 @@ ORDER BY name
         )
     keyboard = list_buttons(projects, "topay_closer#")
     user.bot_state = State.PROJECT_SELECTED.name
-    user.save_to_redis()
+    user.save_fields("bot_state", "bot_state_value")
     return bot.send_message(
         chat_id=user.chat_id,
         text="Выберите проект",
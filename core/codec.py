@@ -0,0 +1,117 @@
+"""
+JSON codec for hot serialization points.
+
+Notification payloads are parsed with orjson when it is installed
+(`pip install taiga-to-bpm[speedups]`), falling back to the stdlib json.
+Codec can be forced with JSON_CODEC environment variable
+("orjson" or "json", default "auto").
+
+Pydantic models are encoded with pydantic-core's own JSON: decoding is
+faster than orjson plus `model_validate` and encoding is on par,
+see benchmarks/codec_benchmark.py.
+
+Example:
+
+    from core import codec
+
+    payload = codec.loads(notification.payload)
+"""
+
+# Standard Library
+import json
+from functools import cache
+from typing import (
+    Any,
+    Protocol,
+    Type,
+    TypeVar,
+)
+
+# Third Party Stuff
+from pydantic import BaseModel
+
+# My Stuff
+from core.settings import settings
+
+try:
+    # Third Party Stuff
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError,
+# so it is caught for every codec
+DecodeError = json.JSONDecodeError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class Codec(Protocol):
+    name: str
+
+    def loads(self, data: str | bytes) -> Any: ...
+
+    def dumps(self, obj: Any) -> str: ...
+
+
+class JsonCodec:
+    name = "json"
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def loads(self, data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+
+CODECS: dict[str, Type[Codec]] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+}
+
+
+def make_codec(name: str = "auto") -> Codec:
+    """
+    Codec by name, "auto" means orjson when it is installed.
+    """
+    if name == "auto":
+        name = "orjson" if orjson else "json"
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec {name}, use one of {list(CODECS)}")
+    if name == "orjson" and not orjson:
+        raise ValueError("JSON codec orjson is not installed")
+    return CODECS[name]()
+
+
+@cache
+def get_codec() -> Codec:
+    """
+    Codec configured with JSON_CODEC setting, created on first use.
+    """
+    return make_codec(settings.json_codec)
+
+
+def loads(data: str | bytes) -> Any:
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any) -> str:
+    return get_codec().dumps(obj)
+
+
+def dump_model(model: BaseModel) -> str:
+    return model.model_dump_json()
+
+
+def load_model(model_class: Type[ModelT], data: str | bytes) -> ModelT:
+    return model_class.model_validate_json(data)
@@ -1,15 +1,60 @@
 from __future__ import annotations
 
+# Standard Library
+from functools import cache
+from typing import Any
+
 # Third Party Stuff
 from pydantic import (
     BaseModel,
     PositiveInt,
 )
+from redis.client import Pipeline
+from redis.typing import (
+    EncodableT,
+    FieldT,
+)
 from telebot import types as telebot_types  # type: ignore[import-untyped]
 
 # My Stuff
+from core import codec
+from core.settings import settings
+from core.user_cache import UserCache
+from core.write_behind import get_user_write_buffer
 from db.db_worker import execute_query
-from db.redis_instance import redis_connection
+from db.redis_instance import get_redis
+
+USER_KEY_PREFIX = "bot:user:"
+
+
+@cache
+def get_user_cache() -> UserCache:
+    """
+    Shared cache of users, created on first use from settings.
+    """
+    return UserCache(
+        key_prefix=USER_KEY_PREFIX,
+        max_size=settings.user_cache_size,
+        max_age=settings.user_cache_max_age,
+    )
+
+
+def user_key(chat_id: int) -> str:
+    """
+    Redis key of user session hash
+    """
+    return f"{USER_KEY_PREFIX}{chat_id}"
+
+
+def hash_fields(fields: dict[str, Any]) -> tuple[dict[FieldT, EncodableT], list[str]]:
+    """
+    Split model fields into hash values to set and None fields to delete.
+    """
+    mapping: dict[FieldT, EncodableT] = {
+        name: str(value) for name, value in fields.items() if value is not None
+    }
+    empty = [name for name, value in fields.items() if value is None]
+    return mapping, empty
 
 
 class User(BaseModel):
@@ -17,6 +62,11 @@ class User(BaseModel):
     User model. Contains all the information about the user.
     Can save and load itself from the Redis and DB.
     Can get itself from the DB and Redis.
+
+    In Redis user is stored as hash `bot:user:<chat_id>` (one hash field
+    per model field, None fields are absent). Session expires after
+    BOT_SESSION_TTL seconds without reads or writes.
+    Recently used users are also cached in process, see core.user_cache.
     """
 
     chat_id: PositiveInt
@@ -29,40 +79,151 @@ class User(BaseModel):
 
     @classmethod
     def get_from_redis(cls, chat_id: int) -> User | None:
-        user_json = str(redis_connection.get(str(chat_id)))
-        if user_json == "None":
+        user_cache = get_user_cache()
+        user = user_cache.get(chat_id)
+        if user:
+            return user
+        version = user_cache.version()
+        key = user_key(chat_id)
+        pipeline = get_redis().pipeline(transaction=False)
+        pipeline.hgetall(key)
+        pipeline.expire(key, settings.bot_session_ttl)
+        fields, _ = pipeline.execute()
+        if fields:
+            user = cls.model_validate(fields)
+            user_cache.put(user, version)
+            return user
+        return cls._migrate_legacy(chat_id)
+
+    @classmethod
+    def _migrate_legacy(cls, chat_id: int) -> User | None:
+        """
+        Move user saved as JSON string under bare `chat_id` key to hash.
+        """
+        user_json = get_redis().getdel(str(chat_id))
+        if not user_json:
             return None
-        return cls.model_validate_json(user_json)
+        user = codec.load_model(cls, user_json)
+        user.save_to_redis()
+        return user
+
+    @classmethod
+    def _merge_legacy(cls, chat_id: int, user_json: str, skip: list[str]) -> None:
+        """
+        Add fields of legacy JSON session to the hash, except `skip` fields
+        and fields that are already set (HSETNX).
+        """
+        key = user_key(chat_id)
+        mapping, _ = hash_fields(codec.load_model(cls, user_json).model_dump())
+        pipeline = get_redis().pipeline()
+        for name, value in mapping.items():
+            if name not in skip:
+                pipeline.hsetnx(key, str(name), str(value))
+        pipeline.expire(key, settings.bot_session_ttl)
+        pipeline.execute()
+
+    @staticmethod
+    def get_field(chat_id: int, field: str) -> str | None:
+        """
+        Read one field of user session without loading the whole user.
+        Returns raw string value, None if user or field is absent.
+        """
+        user = get_user_cache().get(chat_id)
+        if not user:
+            key = user_key(chat_id)
+            pipeline = get_redis().pipeline(transaction=False)
+            pipeline.hget(key, field)
+            pipeline.expire(key, settings.bot_session_ttl)
+            value, exists = pipeline.execute()
+            if exists:
+                return value
+            user = User._migrate_legacy(chat_id)
+            if not user:
+                return None
+        value = getattr(user, field)
+        return None if value is None else str(value)
+
+    def _to_pipeline(self, pipeline: Pipeline) -> None:
+        key = user_key(self.chat_id)
+        mapping, empty = hash_fields(self.model_dump())
+        pipeline.hset(key, mapping=mapping)
+        if empty:
+            pipeline.hdel(key, *empty)
+        pipeline.expire(key, settings.bot_session_ttl)
 
     def save_to_redis(self):
         """
-        Dump user to JSON and save it to Redis.
+        Save user to Redis hash and refresh session TTL in one transaction.
         """
-        redis_connection.set(str(self.chat_id), self.model_dump_json())
+        user_cache = get_user_cache()
+        version = user_cache.version()
+        user_cache.expect_own_write(self.chat_id)
+        pipeline = get_redis().pipeline()
+        self._to_pipeline(pipeline)
+        try:
+            pipeline.execute()
+        except Exception:
+            user_cache.invalidate(self.chat_id)
+            raise
+        user_cache.put(self, version)
 
     def save_to_db(self):
-        query = """
-            INSERT INTO bot_users (telegram_id, name, full_name, json_dump)
-            VALUES (%(chat_id)s, %(name)s, %(full_name)s, %(json_dump)s)
-            ON CONFLICT (telegram_id) DO UPDATE
-            SET json_dump = %(json_dump)s, name = %(name)s, full_name = %(full_name)s
-            ;
-            """
-        args = {
-            "chat_id": self.chat_id,
-            "name": self.name,
-            "full_name": self.full_name,
-            "json_dump": self.model_dump_json(),
-        }
-        execute_query(query, args)
+        """
+        Queue upsert into bot_users, it is written in background
+        by shared UserWriteBuffer (see core.write_behind).
+        """
+        get_user_write_buffer().add(
+            {
+                "chat_id": self.chat_id,
+                "name": self.name,
+                "full_name": self.full_name,
+                "json_dump": codec.dump_model(self),
+            }
+        )
+
+    @staticmethod
+    def update_fields(chat_id: int, **fields: Any) -> None:
+        """
+        Update some fields of user session in Redis.
+        Only given hash fields are written (HSET is atomic), so concurrent
+        updates of other fields are not lost. Creates user if it does not exist.
+        Example:
+
+            User.update_fields(chat_id, bot_state=State.REPORTS_O.name)
+        """
+        for name in fields:
+            if name == "chat_id" or name not in User.model_fields:
+                raise ValueError(f"Field {name} can't be updated")
+        key = user_key(chat_id)
+        mapping, empty = hash_fields(fields)
+        pipeline = get_redis().pipeline()
+        # session saved in legacy format is taken in the same transaction,
+        # so its fields are not lost after the partial write
+        pipeline.getdel(str(chat_id))
+        pipeline.hset(key, mapping={"chat_id": str(chat_id), **mapping})
+        if empty:
+            pipeline.hdel(key, *empty)
+        pipeline.expire(key, settings.bot_session_ttl)
+        legacy_json = pipeline.execute()[0]
+        if legacy_json:
+            User._merge_legacy(chat_id, legacy_json, skip=list(fields))
+        get_user_cache().invalidate(chat_id)
 
     @staticmethod
     def set_state(chat_id: int, state: str):
-        user = User.get_from_redis(chat_id)
-        if not user:
-            user = User(chat_id=chat_id)
-        user.bot_state = state
-        user.save_to_redis()
+        User.update_fields(chat_id, bot_state=state)
+
+    def save_fields(self, *names: str) -> None:
+        """
+        Save only named fields of this user, see `update_fields`.
+        Handlers use it instead of `save_to_redis`, so fields changed
+        concurrently by other handlers are not overwritten:
+
+            user.bot_state = State.REPORTS_O.name
+            user.save_fields("bot_state", "bot_state_value")
+        """
+        fields = {name: getattr(self, name) for name in names}
+        User.update_fields(self.chat_id, **fields)
 
 
 class TUser:
@@ -120,6 +281,8 @@ class TUser:
         pass
 
     def delete(self):
+        # write queued upserts first, so they don't recreate deleted user
+        get_user_write_buffer().flush()
         query = """
             DELETE FROM bot_users
             WHERE telegram_id = %(chat_id)s
@@ -0,0 +1,205 @@
+"""
+Application settings.
+
+Values are read from environment (and .env file) on first access,
+so importing modules that depend on settings is cheap and does not
+fail when some variables are missing. Missing required variable raises
+ValueError only when it is actually used.
+
+Example:
+
+    from core.settings import settings
+
+    get_pool(settings.taiga_db_url)
+"""
+
+# Standard Library
+from functools import cached_property
+from os import environ
+from typing import Optional
+
+# Third Party Stuff
+from dotenv import load_dotenv
+
+
+class Settings:
+    """
+    Lazily loaded configuration, one cached property per variable.
+    Use `reload()` to re-read environment (for example in tests).
+    """
+
+    _dotenv_loaded = False
+
+    def _get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        if not self._dotenv_loaded:
+            load_dotenv()
+            Settings._dotenv_loaded = True
+        return environ.get(name) or default
+
+    def _required(self, name: str) -> str:
+        value = self._get(name)
+        if not value:
+            raise ValueError(f"{name} environment variable not set")
+        return value
+
+    def reload(self) -> None:
+        """
+        Forget cached values, they will be read again on next access.
+        """
+        for name, value in vars(type(self)).items():
+            if isinstance(value, cached_property):
+                self.__dict__.pop(name, None)
+        Settings._dotenv_loaded = False
+
+    # Databases
+
+    @cached_property
+    def taiga_db_url(self) -> str:
+        return self._required("DB_URL")
+
+    @cached_property
+    def creatio_db_url(self) -> str:
+        return self._required("CREATIO_DB_URL")
+
+    @cached_property
+    def db_replica_url(self) -> Optional[str]:
+        return self._get("DB_REPLICA_URL")
+
+    @cached_property
+    def db_replica_max_lag_seconds(self) -> float:
+        return float(self._get("DB_REPLICA_MAX_LAG_SECONDS", "30") or 30)
+
+    @cached_property
+    def db_replica_check_interval(self) -> float:
+        return float(self._get("DB_REPLICA_CHECK_INTERVAL", "10") or 10)
+
+    @cached_property
+    def db_pool_min_size(self) -> int:
+        return int(self._get("DB_POOL_MIN_SIZE", "1") or 1)
+
+    @cached_property
+    def db_pool_max_size(self) -> int:
+        return int(self._get("DB_POOL_MAX_SIZE", "10") or 10)
+
+    @cached_property
+    def db_pool_timeout(self) -> float:
+        return float(self._get("DB_POOL_TIMEOUT", "30") or 30)
+
+    @cached_property
+    def db_slow_query_ms(self) -> float:
+        return float(self._get("DB_SLOW_QUERY_MS", "500") or 500)
+
+    @cached_property
+    def db_stats_file(self) -> str:
+        return self._get("DB_STATS_FILE", "query_stats.txt") or "query_stats.txt"
+
+    # Redis
+
+    @cached_property
+    def redis_host(self) -> str:
+        return self._required("REDIS_HOST")
+
+    @cached_property
+    def redis_port(self) -> int:
+        return int(self._required("REDIS_PORT"))
+
+    @cached_property
+    def redis_db(self) -> int:
+        return int(self._required("REDIS_DB"))
+
+    @cached_property
+    def redis_max_connections(self) -> int:
+        return int(self._get("REDIS_MAX_CONNECTIONS", "20") or 20)
+
+    @cached_property
+    def bot_session_ttl(self) -> int:
+        """
+        Seconds of inactivity after which bot user session is removed from Redis
+        """
+        return int(self._get("BOT_SESSION_TTL", "2592000") or 2592000)
+
+    @cached_property
+    def user_cache_size(self) -> int:
+        """
+        Users kept in process memory in front of Redis, 0 disables the cache
+        """
+        return int(self._get("USER_CACHE_SIZE", "1000") or 0)
+
+    @cached_property
+    def user_cache_max_age(self) -> float:
+        return float(self._get("USER_CACHE_MAX_AGE", "60") or 60)
+
+    @cached_property
+    def user_write_flush_interval(self) -> float:
+        return float(self._get("USER_WRITE_FLUSH_INTERVAL", "5") or 5)
+
+    @cached_property
+    def user_write_max_batch(self) -> int:
+        return int(self._get("USER_WRITE_MAX_BATCH", "100") or 100)
+
+    @cached_property
+    def json_codec(self) -> str:
+        return self._get("JSON_CODEC", "auto") or "auto"
+
+    # Creatio
+
+    @cached_property
+    def creatio_pool_size(self) -> int:
+        return int(self._get("CREATIO_POOL_SIZE", "10") or 10)
+
+    @cached_property
+    def creatio_connect_timeout(self) -> float:
+        return float(self._get("CREATIO_CONNECT_TIMEOUT", "5") or 5)
+
+    @cached_property
+    def creatio_read_timeout(self) -> float:
+        return float(self._get("CREATIO_READ_TIMEOUT", "60") or 60)
+
+    @cached_property
+    def creatio_batch_size(self) -> int:
+        """
+        Objects created with one OData $batch request
+        """
+        return int(self._get("CREATIO_BATCH_SIZE", "50") or 50)
+
+    @cached_property
+    def creatio_push_mode(self) -> str:
+        """
+        How receipt tasks are created: "batch" ($batch requests)
+        or "concurrent" (one request per task in CREATIO_CONCURRENCY threads)
+        """
+        return self._get("CREATIO_PUSH_MODE", "batch") or "batch"
+
+    @cached_property
+    def creatio_concurrency(self) -> int:
+        return int(self._get("CREATIO_CONCURRENCY", "4") or 4)
+
+    @cached_property
+    def creatio_rate_limit(self) -> float:
+        """
+        Requests per second to one Creatio host, 0 disables the limit
+        """
+        return float(self._get("CREATIO_RATE_LIMIT", "10") or 0)
+
+    @cached_property
+    def bpm_settings_ttl(self) -> float:
+        """
+        Seconds Creatio connection settings from bpm_settings are cached
+        """
+        return float(self._get("BPM_SETTINGS_TTL", "300") or 300)
+
+    # Telegram and Taiga
+
+    @cached_property
+    def bot_token(self) -> str:
+        value = self._get("BOT_TOKEN")
+        if not value:
+            raise ValueError("BOT_TOKEN environment variable not set. Check .env file")
+        return value
+
+    @cached_property
+    def taiga_url(self) -> str:
+        return self._get("TAIGA_URL", "https://taiga.smartist.dev") or ""
+
+
+settings = Settings()
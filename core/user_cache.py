@@ -0,0 +1,241 @@
+"""
+In-process cache of bot user sessions in front of Redis.
+
+Callbacks usually load the same user again and again, so recently used
+users are kept in a bounded LRU (USER_CACHE_SIZE entries, 0 disables
+the cache). Entries are served for at most USER_CACHE_MAX_AGE seconds,
+after that user is read from Redis again (which also refreshes session TTL).
+
+Entries changed by other bot processes are invalidated through Redis
+keyspace notifications on `bot:user:*`, received by background thread.
+Redis must be configured with `notify-keyspace-events` containing
+K, g, h, x and e flags (for example `notify-keyspace-events Kghxe` in
+redis.conf). The setting is only checked with CONFIG GET, the cache
+logs a warning and stays disabled when flags are missing.
+While the subscriber is disconnected the cache is bypassed and it is
+cleared on every (re)subscribe, so missed notifications can't leave
+stale entries.
+
+Writes made by this process update the cache directly, notifications
+of their transaction (HSET, HDEL, closed by EXPIRE) are skipped.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import logging
+from collections import OrderedDict
+from threading import (
+    Event,
+    Lock,
+    Thread,
+)
+from time import (
+    monotonic,
+    sleep,
+)
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+# Third Party Stuff
+from redis.exceptions import RedisError
+
+# My Stuff
+from core.settings import settings
+from db.redis_instance import get_redis
+
+if TYPE_CHECKING:
+    # My Stuff
+    from core.models import User
+
+logger = logging.getLogger("user_cache")
+
+# notify-keyspace-events flags: keyspace channel, generic, hash,
+# expired and evicted events. "A" is an alias for all event classes.
+REQUIRED_EVENT_FLAGS = "Kghxe"
+
+# Events that don't change session data
+IGNORED_EVENTS = {"expire"}
+
+# Events generated by User.save_to_redis transaction
+OWN_WRITE_EVENTS = {"hset", "hdel"}
+
+# Last event of User.save_to_redis transaction. HDEL doesn't notify when
+# no field was deleted, so pending write is finished by EXPIRE.
+OWN_WRITE_END_EVENT = "expire"
+
+
+def missing_event_flags(current: str) -> str:
+    """
+    Flags of REQUIRED_EVENT_FLAGS absent from notify-keyspace-events value.
+    """
+    return "".join(
+        flag
+        for flag in REQUIRED_EVENT_FLAGS
+        if flag not in current and not (flag != "K" and "A" in current)
+    )
+
+
+class UserCache:
+    """
+    Thread safe LRU of User models by chat_id, invalidated by
+    Redis keyspace notifications.
+    """
+
+    def __init__(self, key_prefix: str, max_size: int, max_age: float) -> None:
+        self.key_prefix = key_prefix
+        self.max_size = max_size
+        self.max_age = max_age
+        self._users: OrderedDict[int, Tuple[float, User]] = OrderedDict()
+        # Own write transactions whose EXPIRE notification is not received
+        self._own_writes: Dict[int, int] = {}
+        # Incremented on every invalidation, see `version()`
+        self._version = 0
+        self._lock = Lock()
+        self._connected = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Cache is used only while keyspace notifications are received.
+        """
+        if self.max_size <= 0:
+            return False
+        if not self._thread:
+            self._start()
+        return self._connected.is_set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = Thread(target=self._run, name="user_cache", daemon=True)
+            self._thread.start()
+
+    def version(self) -> int:
+        """
+        Take before reading user from Redis and pass to `put`,
+        so user is not cached if it was changed meanwhile.
+        """
+        return self._version
+
+    def get(self, chat_id: int) -> Optional[User]:
+        """
+        Copy of cached user, None if it is not cached or cache is disabled.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._users.get(chat_id)
+            if not entry:
+                return None
+            cached_at, user = entry
+            if monotonic() - cached_at > self.max_age:
+                del self._users[chat_id]
+                return None
+            self._users.move_to_end(chat_id)
+            return user.model_copy()
+
+    def put(self, user: User, version: int) -> None:
+        """
+        Cache copy of user read or written at `version()`.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._users[user.chat_id] = (monotonic(), user.model_copy())
+            self._users.move_to_end(user.chat_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def expect_own_write(self, chat_id: int) -> None:
+        """
+        Call before User.save_to_redis, notifications of its transaction
+        are skipped until its EXPIRE is received.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._own_writes[chat_id] = self._own_writes.get(chat_id, 0) + 1
+
+    def invalidate(self, chat_id: int) -> None:
+        with self._lock:
+            self._version += 1
+            self._users.pop(chat_id, None)
+            self._own_writes.pop(chat_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._users.clear()
+            self._own_writes.clear()
+
+    def _on_event(self, chat_id: int, event: str) -> None:
+        with self._lock:
+            pending = self._own_writes.get(chat_id, 0)
+            if pending and event == OWN_WRITE_END_EVENT:
+                if pending == 1:
+                    del self._own_writes[chat_id]
+                else:
+                    self._own_writes[chat_id] = pending - 1
+                return
+            if event in IGNORED_EVENTS or (pending and event in OWN_WRITE_EVENTS):
+                return
+        self.invalidate(chat_id)
+
+    def _notifications_enabled(self) -> bool:
+        """
+        Check notify-keyspace-events of Redis, it is not changed here:
+        the setting is server wide.
+        """
+        try:
+            config = get_redis().config_get("notify-keyspace-events")
+        except RedisError as e:
+            logger.warning(f"User cache disabled, can't read Redis config: {e}")
+            return False
+        except ValueError as e:
+            # Redis settings are missing or invalid
+            logger.warning(f"User cache disabled: {e}")
+            return False
+        missing = missing_event_flags(config.get("notify-keyspace-events") or "")
+        if missing:
+            logger.warning(
+                "User cache disabled, Redis notify-keyspace-events lacks "
+                f"{missing} flags (set it to {REQUIRED_EVENT_FLAGS})"
+            )
+            return False
+        return True
+
+    def _run(self) -> None:
+        if not self._notifications_enabled():
+            return
+        channel_prefix = f"__keyspace@{settings.redis_db}__:{self.key_prefix}"
+        pubsub = get_redis().pubsub()
+        while True:
+            try:
+                if not pubsub.subscribed:
+                    pubsub.psubscribe(f"{channel_prefix}*")
+                message = pubsub.get_message(timeout=1.0)
+            except RedisError as e:
+                logger.warning(f"User cache subscriber disconnected: {e}")
+                self._connected.clear()
+                self.clear()
+                sleep(1)
+                continue
+            if not message:
+                continue
+            if message["type"] == "psubscribe":
+                # (re)subscribed, notifications could be missed before
+                self.clear()
+                self._connected.set()
+            elif message["type"] == "pmessage":
+                chat_id = message["channel"][len(channel_prefix) :]
+                if chat_id.isdigit():
+                    self._on_event(int(chat_id), message["data"])
@@ -0,0 +1,143 @@
+"""
+Write-behind buffer for bot_users upserts.
+
+`User.save_to_db` only puts user into the buffer, so the reply is not
+delayed by the database. Repeated writes for the same chat_id are
+coalesced and pending users are written with multi-row
+INSERT ... ON CONFLICT of up to USER_WRITE_MAX_BATCH users
+every USER_WRITE_FLUSH_INTERVAL seconds, when USER_WRITE_MAX_BATCH
+users are pending, and at process exit.
+"""
+
+# Standard Library
+import atexit
+import logging
+from functools import cache
+from threading import (
+    Event,
+    Lock,
+    Thread,
+)
+from typing import (
+    Any,
+    Dict,
+    Optional,
+)
+
+# My Stuff
+from core.settings import settings
+from db.db_worker import execute_query
+
+logger = logging.getLogger("user_write_buffer")
+
+
+def upsert_users_query(count: int) -> str:
+    """
+    Multi-row upsert into bot_users for `count` users.
+    Parameters are named chat_id_<i>, name_<i>, full_name_<i>, json_dump_<i>.
+    """
+    values = ",\n".join(
+        f"(%(chat_id_{i})s, %(name_{i})s, %(full_name_{i})s, %(json_dump_{i})s)"
+        for i in range(count)
+    )
+    return f"""
+        INSERT INTO bot_users (telegram_id, name, full_name, json_dump)
+        VALUES
+        {values}
+        ON CONFLICT (telegram_id) DO UPDATE
+        SET
+            json_dump = EXCLUDED.json_dump,
+            name = EXCLUDED.name,
+            full_name = EXCLUDED.full_name
+        ;
+        """
+
+
+class UserWriteBuffer:
+    """
+    Coalescing buffer of bot_users rows flushed by background thread.
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int) -> None:
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._thread: Optional[Thread] = None
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """
+        Queue user row (chat_id, name, full_name, json_dump).
+        Newer row for the same chat_id replaces the pending one.
+        """
+        with self._lock:
+            self._pending[row["chat_id"]] = row
+            size = len(self._pending)
+            if not self._thread:
+                self._thread = Thread(
+                    target=self._run,
+                    name="user_write_buffer",
+                    daemon=True,
+                )
+                self._thread.start()
+        if size >= self.max_batch:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """
+        Write all pending rows now, by upserts of `max_batch` rows at most,
+        so requeued backlog never exceeds the query parameters limit.
+        On error unwritten rows are queued again, unless newer rows
+        for the same users arrived meanwhile.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, {}
+            chunks = list(rows.items())
+            for start in range(0, len(chunks), self.max_batch):
+                chunk = chunks[start : start + self.max_batch]
+                args: Dict[str, Any] = {}
+                for i, (_, row) in enumerate(chunk):
+                    for name, value in row.items():
+                        args[f"{name}_{i}"] = value
+                try:
+                    execute_query(upsert_users_query(len(chunk)), args)
+                except Exception:
+                    with self._lock:
+                        for chat_id, row in chunks[start:]:
+                            self._pending.setdefault(chat_id, row)
+                    raise
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush bot_users, will retry")
+
+    def close(self) -> None:
+        """
+        Flush pending rows, registered with atexit.
+        """
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush bot_users on shutdown")
+
+
+@cache
+def get_user_write_buffer() -> UserWriteBuffer:
+    """
+    Shared buffer, created on first use from settings.
+    It is flushed at process exit.
+    """
+    buffer = UserWriteBuffer(
+        flush_interval=settings.user_write_flush_interval,
+        max_batch=settings.user_write_max_batch,
+    )
+    atexit.register(buffer.close)
+    return buffer
@@ -0,0 +1,156 @@
+"""
+Asyncio counterpart of db_worker.
+Same functions and arguments, but every call is awaitable and uses
+shared AsyncConnectionPool, so many lookups can wait on the database
+concurrently in one thread.
+
+Example:
+
+    user, reports = await asyncio.gather(
+        get_one(USER_QUERY, {"chat_id": chat_id}),
+        get_all(REPORTS_QUERY, {"chat_id": chat_id}),
+    )
+"""
+
+# Standard Library
+from typing import (
+    AsyncIterator,
+    Optional,
+    Sequence,
+)
+from uuid import uuid4
+
+# Third Party Stuff
+from psycopg.rows import TupleRow
+
+# My Stuff
+from core.settings import settings
+from db.db_worker import QueryResult
+from db.pool import get_async_pool
+
+
+async def get_one(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+) -> TupleRow | None:
+    """
+    Returns one row from the database.
+    """
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            return await cursor.fetchone()
+
+
+async def get_first(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+) -> TupleRow | None:
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            return (await cursor.fetchall())[0]
+
+
+async def get_all(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+) -> list[TupleRow] | None:
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            return await cursor.fetchall()
+
+
+async def iter_rows(
+    query: str,
+    args: Optional[dict] = None,
+    batch_size: int = 1000,
+    db_url: Optional[str] = None,
+) -> AsyncIterator[TupleRow]:
+    """
+    Yields rows using named (server-side) cursor, see db_worker.iter_rows.
+    """
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor(name=f"iter_rows_{uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+
+async def execute_query(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+) -> None:
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            await conn.commit()
+
+
+async def execute_many(
+    query: str,
+    args_list: Sequence[dict],
+    returning: bool = False,
+    db_url: Optional[str] = None,
+) -> list[TupleRow]:
+    """
+    Executes one statement for every args dict in a single transaction,
+    see db_worker.execute_many.
+    """
+    db_url = db_url or settings.taiga_db_url
+    if not args_list:
+        return []
+    rows: list[TupleRow] = []
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.executemany(
+                query,  # pyright: ignore[reportArgumentType]
+                args_list,
+                returning=returning,
+            )
+            if returning:
+                while True:
+                    rows.extend(await cursor.fetchall())
+                    if not cursor.nextset():
+                        break
+            await conn.commit()
+    return rows
+
+
+async def query_result(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+) -> QueryResult:
+    """
+    Returns all rows and column names in one query execution.
+    """
+    db_url = db_url or settings.taiga_db_url
+    pool = await get_async_pool(db_url)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            columns = [column.name for column in cursor.description or []]
+            rows = await cursor.fetchall() if cursor.description else []
+            return QueryResult(columns=columns, rows=rows)
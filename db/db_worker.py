@@ -1,31 +1,114 @@
 # Standard Library
-from os import environ
+from contextlib import contextmanager
+from dataclasses import (
+    dataclass,
+    field,
+)
 from typing import (
+    Callable,
+    Iterator,
     List,
     Optional,
+    Sequence,
+    TypeVar,
 )
+from uuid import uuid4
 
 # Third Party Stuff
-from dotenv import load_dotenv
-from psycopg import connect
+from psycopg import (
+    Connection,
+    Cursor,
+)
 from psycopg.rows import TupleRow
 
-load_dotenv()
-TAIGA_DB_URL = environ.get("DB_URL")
-CREATIO_DB_URL = environ.get("CREATIO_DB_URL")
-if not TAIGA_DB_URL:
-    raise ValueError("DB_URL environment variable not set")
-if not CREATIO_DB_URL:
-    raise ValueError("CREATIO_DB_URL environment variable not set")
+# My Stuff
+from core.settings import settings
+from db.pool import get_pool
+from db.query_stats import timed
+from db.replica import (
+    REPLICA_ERRORS,
+    REPLICA_RAISED_ERRORS,
+    ReplicaRouter,
+    configure_replica,
+    get_router,
+)
+
+T = TypeVar("T")
+
+
+def __getattr__(name: str) -> str:
+    """
+    TAIGA_DB_URL and CREATIO_DB_URL are read from settings on first access.
+    `db_url=None` in functions below means Taiga database.
+    """
+    if name == "TAIGA_DB_URL":
+        return settings.taiga_db_url
+    if name == "CREATIO_DB_URL":
+        return settings.creatio_db_url
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class QueryResult:
+    """
+    Rows of executed query together with column names
+    taken from cursor.description.
+    """
+
+    columns: list[str] = field(default_factory=list)
+    rows: list[TupleRow] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[TupleRow]:
+        return iter(self.rows)
+
+
+def _replica_router(db_url: str) -> Optional[ReplicaRouter]:
+    """
+    Replica router for db_url, Taiga replica is registered on first use.
+    """
+    if db_url == settings.taiga_db_url:
+        configure_replica(db_url, settings.db_replica_url)
+    return get_router(db_url)
+
+
+def _read(
+    run: Callable[[Connection], T],
+    db_url: Optional[str],
+    replica: bool,
+) -> T:
+    """
+    Run read-only function on pooled connection.
+    With `replica=True` replica of db_url is used when it is configured
+    and healthy, on replica errors the query is repeated on primary.
+    """
+    db_url = db_url or settings.taiga_db_url
+    router = _replica_router(db_url) if replica else None
+    if router:
+        read_url = router.read_url()
+        if read_url != db_url:
+            try:
+                with get_pool(read_url).connection() as conn:
+                    return run(conn)
+            except REPLICA_RAISED_ERRORS:
+                raise
+            except REPLICA_ERRORS as e:
+                router.mark_unavailable(e)
+    with get_pool(db_url).connection() as conn:
+        return run(conn)
 
 
 def get_one(
     query: str,
     args: Optional[dict] = None,
-    db_url: Optional[str] = TAIGA_DB_URL,
+    db_url: Optional[str] = None,
+    replica: bool = False,
 ) -> TupleRow | None:
     """
     Returns one row from the database.
+    Set `replica=True` for read-only queries that may go to replica.
     Example:
 
         ...
@@ -35,18 +118,20 @@ def get_one(
 
         args = {"chat_id": chat_id}
     """
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
+
+    def run(conn: Connection) -> TupleRow | None:
         with conn.cursor() as cursor:
             cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
             return cursor.fetchone()
 
+    return _read(run, db_url, replica)
+
 
 def get_first(
     query: str,
     args: Optional[dict] = None,
-    db_url: Optional[str] = TAIGA_DB_URL,
+    db_url: Optional[str] = None,
+    replica: bool = False,
 ) -> TupleRow | None:
     """
     Example:
@@ -58,18 +143,20 @@ def get_first(
 
         args = {"chat_id": chat_id}
     """
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
+
+    def run(conn: Connection) -> TupleRow | None:
         with conn.cursor() as cursor:
             cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
             return cursor.fetchall()[0]
 
+    return _read(run, db_url, replica)
+
 
 def get_all(
     query: str,
     args: Optional[dict] = None,
-    db_url: Optional[str] = TAIGA_DB_URL,
+    db_url: Optional[str] = None,
+    replica: bool = False,
 ) -> list[TupleRow] | None:
     """
     Example:
@@ -81,18 +168,53 @@ def get_all(
 
         args = {"chat_id": chat_id}
     """
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
+
+    def run(conn: Connection) -> list[TupleRow] | None:
         with conn.cursor() as cursor:
             cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
             return cursor.fetchall()
 
+    return _read(run, db_url, replica)
+
+
+def iter_rows(
+    query: str,
+    args: Optional[dict] = None,
+    batch_size: int = 1000,
+    db_url: Optional[str] = None,
+    replica: bool = False,
+) -> Iterator[TupleRow]:
+    """
+    Yields rows one by one using named (server-side) cursor.
+    Rows are fetched from the server by `batch_size`, so memory usage
+    does not depend on result size.
+    Connection is held until generator is exhausted or closed.
+    With `replica=True` replica is chosen before the query starts,
+    there is no fallback once rows are yielded.
+    Example:
+
+        for row in iter_rows("SELECT id, subject FROM tasks_task"):
+            ...
+    """
+    db_url = db_url or settings.taiga_db_url
+    router = _replica_router(db_url) if replica else None
+    if router:
+        db_url = router.read_url()
+    with get_pool(db_url).connection() as conn:
+        with conn.cursor(name=f"iter_rows_{uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
 
 def execute_query(
     query: str,
     args: Optional[dict] = None,
-    db_url: Optional[str] = TAIGA_DB_URL,
+    db_url: Optional[str] = None,
 ) -> None:
     """
     Example:
@@ -107,33 +229,147 @@ def execute_query(
             "json_dump": json_dump,
         }
     """
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
+    db_url = db_url or settings.taiga_db_url
+    with get_pool(db_url).connection() as conn:
         with conn.cursor() as cursor:
             cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
             conn.commit()
 
 
+def execute_many(
+    query: str,
+    args_list: Sequence[dict],
+    returning: bool = False,
+    db_url: Optional[str] = None,
+) -> list[TupleRow]:
+    """
+    Executes one statement for every args dict in a single transaction.
+    Parameter sets are sent in pipeline mode, so N rows cost one round trip.
+    With `returning=True` rows from RETURNING clause are collected
+    in the same order as `args_list`.
+    Example:
+        query =
+            INSERT INTO bot_roles_reports (role_id, report_id)
+            VALUES (%(role_id)s, %(report_id)s)
+            RETURNING id
+
+        args_list = [
+            {"role_id": 1, "report_id": 3},
+            {"role_id": 2, "report_id": 3},
+        ]
+    """
+    db_url = db_url or settings.taiga_db_url
+    if not args_list:
+        return []
+    rows: list[TupleRow] = []
+    with get_pool(db_url).connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                query,  # pyright: ignore[reportArgumentType]
+                args_list,
+                returning=returning,
+            )
+            if returning:
+                while True:
+                    rows.extend(cursor.fetchall())
+                    if not cursor.nextset():
+                        break
+            conn.commit()
+    return rows
+
+
+@contextmanager
+def transaction(db_url: Optional[str] = None) -> Iterator[Cursor[TupleRow]]:
+    """
+    Cursor of one transaction, committed when the block succeeds
+    and rolled back when it raises. Row locks taken in the block
+    are held until it exits.
+    Example:
+
+        with transaction() as cursor:
+            cursor.execute(CLAIM_QUERY, args)
+            if cursor.fetchone():
+                ...  # claimed, other transactions wait for this one
+    """
+    db_url = db_url or settings.taiga_db_url
+    with get_pool(db_url).connection() as conn:
+        with conn.transaction():
+            with conn.cursor() as cursor:
+                yield cursor
+
+
+def execute_pipeline(
+    queries: Sequence[tuple[str, Optional[dict]]],
+    db_url: Optional[str] = None,
+) -> None:
+    """
+    Executes different statements in one transaction using pipeline mode.
+    All statements are sent without waiting for each result.
+    Example:
+        queries = [
+            (DELETE_TASKS_QUERY, {"receipt_id": receipt_id}),
+            (DELETE_RECEIPT_QUERY, {"receipt_id": receipt_id}),
+        ]
+
+    Queued statements return before the server runs them, so they are
+    not timed one by one: the whole pipeline is recorded in query stats
+    under its statements joined with "; ".
+    """
+    db_url = db_url or settings.taiga_db_url
+    pipeline_query = "; ".join(query for query, _ in queries)
+    with get_pool(db_url).connection() as conn:
+        with timed(pipeline_query):
+            with conn.pipeline():
+                # plain cursor, pool connections make timed ones
+                with Cursor(conn) as cursor:
+                    for query, args in queries:
+                        cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            conn.commit()
+
+
+def query_result(
+    query: str,
+    args: Optional[dict] = None,
+    db_url: Optional[str] = None,
+    replica: bool = False,
+) -> QueryResult:
+    """
+    Returns all rows and column names in one query execution.
+    Example:
+
+        result = query_result(report_query)
+        result.columns  # ["task", "hours"]
+        result.rows  # [("Task 1", 2), ("Task 2", 4)]
+    """
+
+    def run(conn: Connection) -> QueryResult:
+        with conn.cursor() as cursor:
+            cursor.execute(query, args)  # pyright: ignore[reportArgumentType]
+            columns = [column.name for column in cursor.description or []]
+            rows = cursor.fetchall() if cursor.description else []
+            return QueryResult(columns=columns, rows=rows)
+
+    return _read(run, db_url, replica)
+
+
 def query_columns(
     query_sql: str,
-    db_url: Optional[str] = TAIGA_DB_URL,
+    db_url: Optional[str] = None,
 ) -> List[str]:
-    # Get report column names
+    """
+    Returns column names of query without fetching any rows.
+    Prefer `query_result` when rows are needed too.
+    """
     query = f"""
-SELECT json_object_keys(row_to_json(t)) FROM
-({query_sql} LIMIT 1) t
+SELECT * FROM
+({query_sql.rstrip().rstrip(";")}) t LIMIT 0
     """
-    report_columns = get_all(query, db_url=db_url)
-    if not report_columns:
+    columns = query_result(query, db_url=db_url).columns
+    if not columns:
         raise ValueError("Report columns not found")
-    columns: list[str] = []
-    for column in report_columns:
-        columns.append(str(column[0]))
     return columns
 
 
 if __name__ == "__main__":
-    load_dotenv()
     get_all("SELECT * FROM bot_users")
     pass
@@ -0,0 +1,160 @@
+# Standard Library
+import asyncio
+import atexit
+from threading import Lock
+from typing import (
+    Any,
+    Dict,
+    Tuple,
+)
+
+# Third Party Stuff
+from psycopg.conninfo import conninfo_to_dict
+from psycopg_pool import (
+    AsyncConnectionPool,
+    ConnectionPool,
+)
+
+# My Stuff
+from core.settings import settings
+from db.query_stats import (
+    instrument_async_connection,
+    instrument_connection,
+)
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = Lock()
+# Async pools and their locks belong to the event loop they were created in
+_async_pools: Dict[asyncio.AbstractEventLoop, Dict[str, AsyncConnectionPool]] = {}
+_async_pools_locks: Dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+_async_registry_lock = Lock()
+
+
+def pool_name(db_url: str) -> str:
+    """
+    Human readable pool name (host/dbname) without credentials.
+    Used as key in pool stats and in psycopg_pool logs.
+    """
+    params = conninfo_to_dict(db_url)
+    return f"{params.get('host', 'localhost')}/{params.get('dbname', '')}"
+
+
+def _loop_async_pools() -> Tuple[Dict[str, AsyncConnectionPool], asyncio.Lock]:
+    """
+    Async pools of the running event loop and the lock guarding them.
+    Both are created lazily inside the loop, pools left by closed loops
+    (e.g. previous `asyncio.run`) are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_registry_lock:
+        for closed in [other for other in _async_pools_locks if other.is_closed()]:
+            del _async_pools_locks[closed]
+            _async_pools.pop(closed, None)
+        lock = _async_pools_locks.get(loop)
+        if not lock:
+            lock = _async_pools_locks[loop] = asyncio.Lock()
+        return _async_pools.setdefault(loop, {}), lock
+
+
+def get_pool(db_url: str) -> ConnectionPool:
+    """
+    Returns shared connection pool for DSN. Pool is created on first use.
+    Pool size is configured with settings (environment variables):
+
+        DB_POOL_MIN_SIZE - connections kept open (default 1)
+        DB_POOL_MAX_SIZE - maximum connections (default 10)
+        DB_POOL_TIMEOUT - seconds to wait for free connection (default 30)
+
+    Connections are checked with `SELECT 1` before they are given out,
+    so connections dropped by the server are replaced transparently.
+    Cursors of pooled connections are timed, see db.query_stats.
+    """
+    pool = _pools.get(db_url)
+    if pool:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(db_url)
+        if pool:
+            return pool
+        pool = ConnectionPool(
+            conninfo=db_url,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_timeout,
+            name=pool_name(db_url),
+            check=ConnectionPool.check_connection,
+            configure=instrument_connection,
+            open=True,
+        )
+        _pools[db_url] = pool
+        return pool
+
+
+async def get_async_pool(db_url: str) -> AsyncConnectionPool:
+    """
+    Async counterpart of `get_pool`, configured with the same
+    environment variables. Pool belongs to the running event loop,
+    every loop gets its own pools.
+    """
+    pools, lock = _loop_async_pools()
+    pool = pools.get(db_url)
+    if pool:
+        return pool
+    async with lock:
+        pool = pools.get(db_url)
+        if pool:
+            return pool
+        pool = AsyncConnectionPool(
+            conninfo=db_url,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_timeout,
+            name=f"{pool_name(db_url)} (async)",
+            check=AsyncConnectionPool.check_connection,
+            configure=instrument_async_connection,
+            open=False,
+        )
+        await pool.open()
+        pools[db_url] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns psycopg_pool statistics for every opened pool.
+    Example:
+
+        {"db-host/taiga": {"pool_min": 1, "pool_max": 10, "pool_size": 2, ...}}
+    """
+    with _async_registry_lock:
+        async_pools = [
+            pool for pools in _async_pools.values() for pool in pools.values()
+        ]
+    pools: list[ConnectionPool | AsyncConnectionPool] = [
+        *_pools.values(),
+        *async_pools,
+    ]
+    return {pool.name: pool.get_stats() for pool in pools}
+
+
+@atexit.register
+def close_pools() -> None:
+    """
+    Close all opened pools. Registered with atexit.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+async def close_async_pools() -> None:
+    """
+    Close all async pools opened in the running event loop.
+    Should be awaited before the event loop is stopped.
+    """
+    pools, lock = _loop_async_pools()
+    async with lock:
+        for pool in pools.values():
+            await pool.close()
+        pools.clear()
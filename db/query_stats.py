@@ -0,0 +1,249 @@
+"""
+Query latency instrumentation.
+
+Every statement executed through instrumented cursors is timed and
+recorded under its fingerprint (query text with literals and
+whitespace normalized). Statements slower than DB_SLOW_QUERY_MS
+(default 500) are logged with the shape of their arguments,
+argument values are never logged.
+
+Pools from db.pool and PostgresDataStorage connections use
+instrumented cursors, so handlers, creatio_worker, listener lookups
+and user reports from bot_reports are all covered.
+"""
+
+# Standard Library
+import logging
+import re
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import (
+    dataclass,
+    field,
+)
+from threading import Lock
+from time import perf_counter
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+)
+
+# Third Party Stuff
+from psycopg import (
+    AsyncConnection,
+    AsyncCursor,
+    AsyncServerCursor,
+    Connection,
+    Cursor,
+    ServerCursor,
+)
+
+# My Stuff
+from core.settings import settings
+
+logger = logging.getLogger("query_stats")
+
+# Histogram bucket upper bounds in milliseconds, last bucket is unbounded
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_comment_re = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_string_re = re.compile(r"'(?:[^']|'')*'")
+_number_re = re.compile(r"\b\d+(?:\.\d+)?\b")
+_whitespace_re = re.compile(r"\s+")
+
+
+def fingerprint(query: Any) -> str:
+    """
+    Normalized query text used as statistics key.
+    Example:
+
+        SELECT * FROM t WHERE id = 5 AND name = 'x'
+        -> SELECT * FROM t WHERE id = ? AND name = ?
+    """
+    text = query if isinstance(query, str) else repr(query)
+    text = _comment_re.sub(" ", text)
+    text = _string_re.sub("?", text)
+    text = _number_re.sub("?", text)
+    return _whitespace_re.sub(" ", text).strip()
+
+
+def args_shape(args: Any) -> Any:
+    """
+    Argument names and types without values, safe to log.
+    Example:
+
+        {"chat_id": 65310} -> {"chat_id": "int"}
+    """
+    if args is None:
+        return None
+    if isinstance(args, dict):
+        return {key: type(value).__name__ for key, value in args.items()}
+    if isinstance(args, (list, tuple)):
+        if args and isinstance(args[0], dict):
+            return f"{len(args)} x {args_shape(args[0])}"
+        return [type(value).__name__ for value in args]
+    return type(args).__name__
+
+
+@dataclass
+class QueryStat:
+    """
+    Latency histogram of one query fingerprint
+    """
+
+    fingerprint: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Upper bound of the histogram bucket containing the percentile.
+        """
+        target = self.count * percent / 100
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    """
+    Thread safe registry of QueryStat by fingerprint
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._stats: Dict[str, QueryStat] = {}
+
+    def record(self, query: Any, args: Any, elapsed_ms: float) -> None:
+        key = fingerprint(query)
+        with self._lock:
+            stat = self._stats.get(key)
+            if not stat:
+                stat = self._stats[key] = QueryStat(fingerprint=key)
+            stat.add(elapsed_ms)
+        if elapsed_ms >= settings.db_slow_query_ms:
+            logger.warning(
+                f"Slow query {elapsed_ms:.1f} ms, args: {args_shape(args)}\n{key}"
+            )
+
+    def snapshot(self) -> List[QueryStat]:
+        """
+        Copy of collected stats, slowest total time first.
+        """
+        with self._lock:
+            stats = [
+                QueryStat(
+                    fingerprint=stat.fingerprint,
+                    count=stat.count,
+                    total_ms=stat.total_ms,
+                    max_ms=stat.max_ms,
+                    buckets=list(stat.buckets),
+                )
+                for stat in self._stats.values()
+            ]
+        return sorted(stats, key=lambda stat: stat.total_ms, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> str:
+        """
+        Plain text report, one block per fingerprint.
+        """
+        lines: List[str] = []
+        for stat in self.snapshot():
+            lines.append(
+                f"count={stat.count} total={stat.total_ms:.1f}ms "
+                f"avg={stat.avg_ms:.1f}ms p50<={stat.percentile(50):.0f}ms "
+                f"p95<={stat.percentile(95):.0f}ms max={stat.max_ms:.1f}ms"
+            )
+            lines.append(stat.fingerprint)
+            lines.append("")
+        return "\n".join(lines) or "No queries recorded"
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+
+
+query_stats = QueryStats()
+
+
+@contextmanager
+def timed(query: Any, args: Any = None) -> Iterator[None]:
+    """
+    Record execution time of the block under query fingerprint.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        query_stats.record(query, args, (perf_counter() - start) * 1000)
+
+
+class TimedCursor(Cursor):
+    def execute(self, query, params=None, **kwargs):
+        with timed(query, params):
+            return super().execute(query, params, **kwargs)
+
+    def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        with timed(query, params_seq):
+            return super().executemany(query, params_seq, **kwargs)
+
+
+class TimedServerCursor(ServerCursor):
+    def execute(self, query, params=None, **kwargs):
+        with timed(query, params):
+            return super().execute(query, params, **kwargs)
+
+
+class TimedAsyncCursor(AsyncCursor):
+    async def execute(self, query, params=None, **kwargs):
+        with timed(query, params):
+            return await super().execute(query, params, **kwargs)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        with timed(query, params_seq):
+            return await super().executemany(query, params_seq, **kwargs)
+
+
+class TimedAsyncServerCursor(AsyncServerCursor):
+    async def execute(self, query, params=None, **kwargs):
+        with timed(query, params):
+            return await super().execute(query, params, **kwargs)
+
+
+def instrument_connection(conn: Connection) -> None:
+    """
+    Make every cursor of connection timed. Used as pool `configure` callback.
+    """
+    conn.cursor_factory = TimedCursor
+    conn.server_cursor_factory = TimedServerCursor
+
+
+async def instrument_async_connection(conn: AsyncConnection) -> None:
+    """
+    Async counterpart of `instrument_connection`.
+    """
+    conn.cursor_factory = TimedAsyncCursor
+    conn.server_cursor_factory = TimedAsyncServerCursor
@@ -1,30 +1,46 @@
 # Standard Library
-from os import getenv
+from functools import cache
 
 # Third Party Stuff
-from dotenv import load_dotenv
-from redis import Redis
-
-load_dotenv()
-
-REDIS_HOST = getenv("REDIS_HOST")
-if not REDIS_HOST:
-    raise ValueError("REDIS_HOST is not set")
-
-port = getenv("REDIS_PORT")
-if not port:
-    raise ValueError("REDIS_PORT is not set")
-REDIS_PORT = int(port)
-
-db = getenv("REDIS_DB")
-if not db:
-    raise ValueError("REDIS_DB is not set")
-REDIS_DB = int(db)
-
-redis_connection = Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    decode_responses=True,
-    encoding="utf-8",
+from redis import (
+    BlockingConnectionPool,
+    Redis,
 )
+
+# My Stuff
+from core.settings import settings
+
+
+@cache
+def get_redis_pool() -> BlockingConnectionPool:
+    """
+    Shared Redis connection pool, created on first use from settings.
+    Waits for a free connection when REDIS_MAX_CONNECTIONS are in use.
+    """
+    return BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        max_connections=settings.redis_max_connections,
+        timeout=10,
+        health_check_interval=30,
+        decode_responses=True,
+        encoding="utf-8",
+    )
+
+
+@cache
+def get_redis() -> Redis:
+    """
+    Shared Redis client on top of the shared pool.
+    """
+    return Redis(connection_pool=get_redis_pool())
+
+
+def __getattr__(name: str) -> Redis:
+    """
+    `redis_connection` is kept for compatibility, prefer `get_redis()`.
+    """
+    if name == "redis_connection":
+        return get_redis()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
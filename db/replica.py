@@ -0,0 +1,140 @@
+"""
+Read replica routing.
+
+Read-only queries can be sent to a streaming replica of the primary.
+Replica is used only while it is reachable and its replay lag is below
+DB_REPLICA_MAX_LAG_SECONDS, otherwise reads fall back to the primary.
+Replica state is re-checked every DB_REPLICA_CHECK_INTERVAL seconds.
+"""
+
+# Standard Library
+import logging
+from threading import Lock
+from time import monotonic
+from typing import (
+    Dict,
+    Optional,
+)
+
+# Third Party Stuff
+from psycopg import (
+    Error as PsycopgError,
+    OperationalError,
+)
+from psycopg.errors import QueryCanceled
+from psycopg_pool import PoolTimeout
+
+# My Stuff
+from core.settings import settings
+from db.pool import get_pool
+
+logger = logging.getLogger("replica_router")
+
+REPLICA_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# Errors meaning that replica can't serve reads right now
+# (connection lost, canceled by recovery conflict, pool exhausted)
+REPLICA_ERRORS = (OperationalError, PoolTimeout)
+
+# Replica errors that are raised instead of repeating the query on primary:
+# statement_timeout raises QueryCanceled (an OperationalError), and heavy
+# query that timed out on replica would only load the primary.
+REPLICA_RAISED_ERRORS = (QueryCanceled,)
+
+
+class ReplicaRouter:
+    """
+    Chooses DSN for read-only queries: replica when it is healthy,
+    primary otherwise. Writes must always use primary_url.
+    """
+
+    def __init__(
+        self,
+        primary_url: str,
+        replica_url: str,
+        max_lag_seconds: float = 30.0,
+        check_interval: float = 10.0,
+    ) -> None:
+        self.primary_url = primary_url
+        self.replica_url = replica_url
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._healthy = False
+        self._checked_at: Optional[float] = None
+        self._lock = Lock()
+
+    def read_url(self) -> str:
+        """
+        DSN to use for the next read-only query.
+        Replica is checked outside of the lock by one thread at a time,
+        other threads keep using the last known state meanwhile.
+        """
+        with self._lock:
+            now = monotonic()
+            elapsed = None if self._checked_at is None else now - self._checked_at
+            check = elapsed is None or elapsed >= self.check_interval
+            if check:
+                self._checked_at = now
+        if check:
+            healthy = self._check()
+            with self._lock:
+                # replica failure reported during the check is newer
+                if self._checked_at == now:
+                    self._healthy = healthy
+        with self._lock:
+            healthy = self._healthy
+        return self.replica_url if healthy else self.primary_url
+
+    def mark_unavailable(self, error: Exception) -> None:
+        """
+        Send reads to primary until the next check.
+        Called when query on replica failed.
+        """
+        logger.warning(f"Replica query failed, using primary: {error}")
+        with self._lock:
+            self._healthy = False
+            self._checked_at = monotonic()
+
+    def _check(self) -> bool:
+        try:
+            with get_pool(self.replica_url).connection(timeout=2) as conn:
+                row = conn.execute(REPLICA_LAG_QUERY).fetchone()
+        except (PsycopgError, PoolTimeout) as e:
+            logger.warning(f"Replica is unreachable, using primary: {e}")
+            return False
+        lag = float(row[0]) if row and row[0] is not None else 0.0
+        if lag > self.max_lag_seconds:
+            logger.warning(f"Replica lag {lag:.1f}s, using primary")
+            return False
+        return True
+
+
+_routers: Dict[str, ReplicaRouter] = {}
+
+
+def configure_replica(primary_url: str, replica_url: Optional[str]) -> None:
+    """
+    Register replica for primary DSN. Does nothing when replica_url is empty.
+    Lag threshold and check interval are read from settings:
+
+        DB_REPLICA_MAX_LAG_SECONDS (default 30)
+        DB_REPLICA_CHECK_INTERVAL (default 10)
+    """
+    if not replica_url or primary_url in _routers:
+        return
+    _routers[primary_url] = ReplicaRouter(
+        primary_url=primary_url,
+        replica_url=replica_url,
+        max_lag_seconds=settings.db_replica_max_lag_seconds,
+        check_interval=settings.db_replica_check_interval,
+    )
+
+
+def get_router(primary_url: str) -> Optional[ReplicaRouter]:
+    return _routers.get(primary_url)
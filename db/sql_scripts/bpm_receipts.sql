@@ -0,0 +1,24 @@
+-- Чекпоинты создания чеков в Creatio (resumable create_new_receipt)
+
+-- Чек проекта, finished_at заполняется после переноса задач в статус оплачено
+CREATE TABLE IF NOT EXISTS bpm_receipts (
+    receipt_guid uuid PRIMARY KEY,
+    project_id integer NOT NULL,
+    receipt_url text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    finished_at timestamptz NULL
+);
+
+-- Не больше одного незавершенного чека на проект
+CREATE UNIQUE INDEX IF NOT EXISTS bpm_receipts_open_project_idx
+ON bpm_receipts (project_id)
+WHERE finished_at IS NULL;
+
+-- Задачи, уже созданные в чеке (SLReceiptTask)
+CREATE TABLE IF NOT EXISTS bpm_receipt_tasks (
+    receipt_guid uuid NOT NULL REFERENCES bpm_receipts (receipt_guid) ON DELETE CASCADE,
+    task_id integer NOT NULL,
+    task_guid uuid NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (receipt_guid, task_id)
+);
@@ -0,0 +1,5 @@
+-- Query statistics command, id matches Command.DB_STATS in bot_interface/handlers.py
+-- Grant it to admin role with bot_roles_commands
+INSERT INTO bot_commands (id, "name")
+VALUES (7, 'Статистика запросов')
+ON CONFLICT (id) DO NOTHING;
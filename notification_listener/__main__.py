@@ -1,15 +1,14 @@
 # Standard Library
 import logging
-import os
 import signal
 import sys
-
-# Third Party Stuff
-from dotenv import load_dotenv
+from threading import Thread
 
 # My Stuff
 # Local Application
-from bot_interface.bot_instance import bot
+from bot_interface.bot_instance import get_bot
+from core.settings import settings
+from db.query_stats import query_stats
 from notification_listener.listener import (
     PostgresNotificationListener,
 )
@@ -31,22 +30,21 @@ logger = logging.getLogger("notification_listener")
 
 def main() -> None:
     """Main entry point for notification listener service"""
-    load_dotenv()
-
-    # Get database URL from environment
-    db_url = os.environ.get("DB_URL")
-    if not db_url:
-        logger.error("DB_URL environment variable not set")
+    # Get database URL from settings
+    try:
+        db_url = settings.taiga_db_url
+    except ValueError as e:
+        logger.error(str(e))
         sys.exit(1)
 
-    # Get Taiga base URL from environment or use default
-    taiga_base_url = os.environ.get("TAIGA_URL", "https://taiga.smartist.dev")
+    # Get Taiga base URL from settings or use default
+    taiga_base_url = settings.taiga_url
 
     # Initialize data storage, processor and listener
     data_storage = get_data_storage()
     processor = Processor(
         data_storage=data_storage,
-        bot=bot,
+        bot=get_bot(),
         base_url=taiga_base_url,
     )
     listener = PostgresNotificationListener(
@@ -54,14 +52,29 @@ def main() -> None:
         processor=processor,
     )
 
-    # Set up signal handling for graceful shutdown
+    # Query statistics file, written on SIGUSR1 and on shutdown
+    stats_file = settings.db_stats_file
+
+    def dump_stats():
+        query_stats.dump(stats_file)
+        logger.info(f"Query statistics written to {stats_file}")
+
+    # Signal may interrupt the main thread while it records a query,
+    # so stats are dumped by another thread that waits for the lock
+    def dump_stats_handler(sig, frame):
+        Thread(target=dump_stats, name="dump_query_stats").start()
+
+    # Set up signal handling for graceful shutdown. Handler only stops
+    # the listener: it runs on the main thread, which may be in the middle
+    # of a storage lookup, so storage is closed and stats are dumped
+    # after the listener returns
     def signal_handler(sig, frame):
         logger.info("Shutdown signal received, stopping listener")
         listener.stop()
-        sys.exit(0)
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGUSR1, dump_stats_handler)
 
     # Start the listener
     try:
@@ -73,6 +86,9 @@ def main() -> None:
         logger.error(f"Fatal error: {str(e)}")
         listener.stop()
         sys.exit(1)
+    finally:
+        data_storage.close()
+        dump_stats()
 
 
 if __name__ == "__main__":
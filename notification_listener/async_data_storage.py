@@ -0,0 +1,186 @@
+# Standard Library
+import logging
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+# Third Party Stuff
+from psycopg.rows import (
+    BaseRowFactory,
+    dict_row,
+)
+
+# My Stuff
+# Local Application
+from core.settings import settings
+from db.pool import get_async_pool
+from notification_listener.data_storage import (
+    TAIGA_USER_BY_ID_QUERY,
+    TAIGA_USER_QUERY,
+    USERS_BY_ROLE_ID_QUERY,
+    bot_user_row,
+    taiga_user_row,
+)
+from notification_listener.domain.user.models import (
+    BotUser,
+    TaigaUser,
+)
+from notification_listener.interfaces import IAsyncDataStorage
+
+
+class AsyncPostgresDataStorage(IAsyncDataStorage):
+    """Asyncio PostgreSQL implementation of data storage
+
+    Uses shared AsyncConnectionPool, so independent lookups
+    can be awaited concurrently with asyncio.gather.
+    """
+
+    def __init__(self, db_url: str) -> None:
+        """Initialize with database URL
+
+        Args:
+            db_url: PostgreSQL connection string
+        """
+        self.db_url = db_url
+        self.logger = logging.getLogger("async_postgres_storage")
+
+    async def get_users_by_role_id(self, role_id: int) -> List[Dict[str, Any]]:
+        """Get users with specific role
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of user records with telegram_id
+        """
+        args = {"role_id": role_id}
+        return await self.get_all(USERS_BY_ROLE_ID_QUERY, args)
+
+    async def get_bot_users_by_role_id(self, role_id: int) -> List[BotUser]:
+        """Get users with specific role as slotted BotUser objects
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of BotUser
+        """
+        args = {"role_id": role_id}
+        return await self.get_all(
+            USERS_BY_ROLE_ID_QUERY, args, row_factory=bot_user_row
+        )
+
+    async def get_taiga_user(self, user_id: int) -> Optional[TaigaUser]:
+        """Get Taiga user built directly from row
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            TaigaUser or None if not found
+        """
+        args = {"user_id": user_id}
+        return await self.get_one(TAIGA_USER_QUERY, args, row_factory=taiga_user_row)
+
+    async def get_taiga_user_by_id(self, user_id: int) -> Dict[str, Any] | None:
+        """Get Taiga user by their id
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            User record or None if not found
+        """
+        args = {"user_id": user_id}
+        return await self.get_one(TAIGA_USER_BY_ID_QUERY, args)
+
+    async def execute_query(
+        self, query: str, args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Execute a query without returning results
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+        """
+        try:
+            pool = await get_async_pool(self.db_url)
+            async with pool.connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, args)
+                    await conn.commit()
+        except Exception as e:
+            self.logger.error(f"Database error: {str(e)}")
+            raise
+
+    async def get_one(
+        self,
+        query: str,
+        args: Optional[Dict[str, Any]] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> Any:
+        """Get a single record from database
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+            row_factory: Row factory, dict_row by default
+
+        Returns:
+            Single record or None if not found
+        """
+        try:
+            pool = await get_async_pool(self.db_url)
+            async with pool.connection() as conn:
+                async with conn.cursor(row_factory=row_factory or dict_row) as cursor:
+                    await cursor.execute(query, args)
+                    return await cursor.fetchone()
+        except Exception as e:
+            self.logger.error(f"Database error in get_one: {str(e)}")
+            return None
+
+    async def get_all(
+        self,
+        query: str,
+        args: Optional[Dict[str, Any]] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> List[Any]:
+        """Get multiple records from database
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+            row_factory: Row factory, dict_row by default
+
+        Returns:
+            List of records
+        """
+        try:
+            pool = await get_async_pool(self.db_url)
+            async with pool.connection() as conn:
+                async with conn.cursor(row_factory=row_factory or dict_row) as cursor:
+                    await cursor.execute(query, args)
+                    return await cursor.fetchall() or []
+        except Exception as e:
+            self.logger.error(f"Database error: {str(e)}")
+            return []
+
+    async def close(self) -> None:
+        """Nothing to release: storage doesn't own connections
+
+        Async pools are shared with other users of db.pool, so they
+        are closed by the application with `db.pool.close_async_pools`
+        before its event loop is stopped.
+        """
+
+
+def get_async_data_storage() -> IAsyncDataStorage:
+    """Create async data storage instance
+
+    Returns:
+        Async data storage implementation
+    """
+    return AsyncPostgresDataStorage(settings.taiga_db_url)
@@ -1,6 +1,6 @@
 # Standard Library
 import logging
-import os
+from threading import Lock
 from typing import (
     Any,
     Dict,
@@ -9,26 +9,183 @@ from typing import (
 )
 
 # Third Party Stuff
-from dotenv import load_dotenv
-from psycopg import connect
-from psycopg.rows import dict_row
+from psycopg import (
+    Connection,
+    OperationalError,
+    connect,
+)
+from psycopg.rows import (
+    BaseRowFactory,
+    class_row,
+    dict_row,
+)
 
 # My Stuff
 # Local Application
+from core.settings import settings
+from db.query_stats import TimedCursor
+from db.replica import (
+    REPLICA_ERRORS,
+    REPLICA_RAISED_ERRORS,
+    configure_replica,
+    get_router,
+)
+from notification_listener.domain.user.models import (
+    BotUser,
+    TaigaUser,
+)
 from notification_listener.interfaces import IDataStorage
 
+USERS_BY_ROLE_ID_QUERY = """
+SELECT u.id, u.telegram_id, u.name, u.full_name
+FROM bot_users u
+JOIN bot_user_roles ur ON ur.user_id = u.id
+JOIN bot_roles r ON r.id = ur.role_id
+WHERE r.id = %(role_id)s
+"""
+
+TAIGA_USER_BY_ID_QUERY = """
+SELECT u.id, u.username, u.full_name, u.username as name, b.telegram_id
+FROM users_user u
+LEFT JOIN bot_users b ON b.taiga_id = u.id
+WHERE u.id = %(user_id)s
+"""
+
+# Columns match TaigaUser fields, rows are built with class_row(TaigaUser)
+TAIGA_USER_QUERY = """
+SELECT u.id, u.username, u.full_name, b.telegram_id
+FROM users_user u
+LEFT JOIN bot_users b ON b.taiga_id = u.id
+WHERE u.id = %(user_id)s
+"""
+
+# Row factories building slotted domain objects without intermediate dicts
+taiga_user_row = class_row(TaigaUser)
+bot_user_row = class_row(BotUser)
+
 
 class PostgresDataStorage(IDataStorage):
-    """PostgreSQL implementation of data storage"""
+    """PostgreSQL implementation of data storage
+
+    Keeps one long-lived autocommit connection per DSN (primary and replica).
+    Fixed lookups are executed with server-side prepared statements,
+    so they are parsed and planned once per connection.
+    """
 
-    def __init__(self, db_url: str) -> None:
+    def __init__(self, db_url: str, replica_url: Optional[str] = None) -> None:
         """Initialize with database URL
 
         Args:
             db_url: PostgreSQL connection string
+            replica_url: Optional read replica connection string,
+                get_one and get_all read from it while it is healthy
         """
         self.db_url = db_url
         self.logger = logging.getLogger("postgres_storage")
+        self._connections: Dict[str, Connection] = {}
+        self._lock = Lock()
+        configure_replica(db_url, replica_url)
+
+    def _connection(self, db_url: str) -> Connection:
+        """Get long-lived connection for DSN, reconnecting if it was closed
+
+        Args:
+            db_url: PostgreSQL connection string
+
+        Returns:
+            Open connection
+        """
+        conn = self._connections.get(db_url)
+        if conn is None or conn.closed:
+            conn = connect(
+                conninfo=db_url,
+                autocommit=True,
+                cursor_factory=TimedCursor,
+            )
+            self._connections[db_url] = conn
+        return conn
+
+    def _execute(
+        self,
+        db_url: str,
+        query: str,
+        args: Optional[Dict[str, Any]],
+        fetch: Optional[str] = None,
+        prepare: Optional[bool] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> Any:
+        """Execute query on long-lived connection
+
+        Broken connection is replaced and the query is retried once.
+
+        Args:
+            db_url: PostgreSQL connection string
+            query: SQL query to execute
+            args: Query parameters
+            fetch: "one", "all" or None to fetch nothing
+            prepare: True to use server-side prepared statement
+            row_factory: Row factory, dict_row by default
+
+        Returns:
+            Fetched row(s) or None
+        """
+        with self._lock:
+            for attempt in range(2):
+                conn = self._connection(db_url)
+                try:
+                    with conn.cursor(row_factory=row_factory or dict_row) as cursor:
+                        cursor.execute(query, args, prepare=prepare)
+                        if fetch == "one":
+                            return cursor.fetchone()
+                        if fetch == "all":
+                            return cursor.fetchall()
+                        return None
+                except OperationalError:
+                    if attempt or not conn.broken:
+                        raise
+                    self.logger.warning("Database connection lost, reconnecting")
+                    conn.close()
+
+    def close(self) -> None:
+        """Close all long-lived connections"""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+    def _read(
+        self,
+        query: str,
+        args: Optional[Dict[str, Any]],
+        fetch: str,
+        prepare: Optional[bool] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> Any:
+        """Run read-only query on replica if it is healthy, otherwise on primary
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+            fetch: "one" or "all"
+            prepare: True to use server-side prepared statement
+            row_factory: Row factory, dict_row by default
+
+        Returns:
+            Fetched row(s)
+        """
+        router = get_router(self.db_url)
+        if router:
+            read_url = router.read_url()
+            if read_url != self.db_url:
+                try:
+                    return self._execute(
+                        read_url, query, args, fetch, prepare, row_factory
+                    )
+                except REPLICA_RAISED_ERRORS:
+                    raise
+                except REPLICA_ERRORS as e:
+                    router.mark_unavailable(e)
+        return self._execute(self.db_url, query, args, fetch, prepare, row_factory)
 
     def get_users_by_role_id(self, role_id: int) -> List[Dict[str, Any]]:
         """Get users with specific role
@@ -39,16 +196,37 @@ class PostgresDataStorage(IDataStorage):
         Returns:
             List of user records with telegram_id
         """
-        query = """
-        SELECT u.id, u.telegram_id, u.name, u.full_name
-        FROM bot_users u
-        JOIN bot_user_roles ur ON ur.user_id = u.id
-        JOIN bot_roles r ON r.id = ur.role_id
-        WHERE r.id = %(role_id)s
+        args = {"role_id": role_id}
+
+        return self.get_all(USERS_BY_ROLE_ID_QUERY, args, prepare=True)
+
+    def get_bot_users_by_role_id(self, role_id: int) -> List[BotUser]:
+        """Get users with specific role as slotted BotUser objects
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of BotUser
         """
         args = {"role_id": role_id}
+        return self.get_all(
+            USERS_BY_ROLE_ID_QUERY, args, prepare=True, row_factory=bot_user_row
+        )
 
-        return self.get_all(query, args)
+    def get_taiga_user(self, user_id: int) -> Optional[TaigaUser]:
+        """Get Taiga user built directly from row
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            TaigaUser or None if not found
+        """
+        args = {"user_id": user_id}
+        return self.get_one(
+            TAIGA_USER_QUERY, args, prepare=True, row_factory=taiga_user_row
+        )
 
     def get_taiga_user_by_id(self, user_id: int) -> Dict[str, Any] | None:
         """Get Taiga user by their id
@@ -60,16 +238,10 @@ class PostgresDataStorage(IDataStorage):
             User record or None if not found
         """
         self.logger.debug(f"get_taiga_user_by_id called with user_id={user_id}")
-        query = """
-        SELECT u.id, u.username, u.full_name, u.username as name, b.telegram_id
-        FROM users_user u
-        LEFT JOIN bot_users b ON b.taiga_id = u.id
-        WHERE u.id = %(user_id)s
-        """
-        self.logger.debug(f"SQL query: {query}")
+        self.logger.debug(f"SQL query: {TAIGA_USER_BY_ID_QUERY}")
         args = {"user_id": user_id}
 
-        result = self.get_one(query, args)
+        result = self.get_one(TAIGA_USER_BY_ID_QUERY, args, prepare=True)
         self.logger.debug(f"get_taiga_user_by_id result: {result}")
         return result
 
@@ -81,22 +253,27 @@ class PostgresDataStorage(IDataStorage):
             args: Query parameters
         """
         try:
-            with connect(conninfo=self.db_url) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, args)
-                    conn.commit()
+            self._execute(self.db_url, query, args)
         except Exception as e:
             self.logger.error(f"Database error: {str(e)}")
             raise
 
     def get_one(
-        self, query: str, args: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any] | None:
+        self,
+        query: str,
+        args: Optional[Dict[str, Any]] = None,
+        prepare: Optional[bool] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> Any:
         """Get a single record from database
 
         Args:
             query: SQL query to execute
             args: Query parameters
+            prepare: True to use server-side prepared statement,
+                None to let psycopg prepare frequently executed queries
+            row_factory: Row factory, dict_row by default. Use
+                namedtuple_row or class_row(SlottedClass) for compact rows
 
         Returns:
             Single record or None if not found
@@ -104,33 +281,35 @@ class PostgresDataStorage(IDataStorage):
         try:
             self.logger.debug(f"get_one executing query: {query}")
             self.logger.debug(f"get_one arguments: {args}")
-            with connect(conninfo=self.db_url, row_factory=dict_row) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, args)
-                    result = cursor.fetchone()
-                    self.logger.debug(f"get_one result: {result}")
-                    return result
+            result = self._read(query, args, "one", prepare, row_factory)
+            self.logger.debug(f"get_one result: {result}")
+            return result
         except Exception as e:
             self.logger.error(f"Database error in get_one: {str(e)}")
             return None
 
     def get_all(
-        self, query: str, args: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+        self,
+        query: str,
+        args: Optional[Dict[str, Any]] = None,
+        prepare: Optional[bool] = None,
+        row_factory: Optional[BaseRowFactory[Any]] = None,
+    ) -> List[Any]:
         """Get multiple records from database
 
         Args:
             query: SQL query to execute
             args: Query parameters
+            prepare: True to use server-side prepared statement,
+                None to let psycopg prepare frequently executed queries
+            row_factory: Row factory, dict_row by default. Use
+                namedtuple_row or class_row(SlottedClass) for compact rows
 
         Returns:
             List of records
         """
         try:
-            with connect(conninfo=self.db_url, row_factory=dict_row) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, args)
-                    return cursor.fetchall() or []
+            return self._read(query, args, "all", prepare, row_factory) or []
         except Exception as e:
             self.logger.error(f"Database error: {str(e)}")
             return []
@@ -143,9 +322,7 @@ def get_data_storage() -> IDataStorage:
     Returns:
         Data storage implementation
     """
-    load_dotenv()
-    db_url = os.environ.get("DB_URL")
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-
-    return PostgresDataStorage(db_url)
+    return PostgresDataStorage(
+        settings.taiga_db_url,
+        replica_url=settings.db_replica_url,
+    )
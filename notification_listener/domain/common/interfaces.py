@@ -1,21 +1,21 @@
 # Standard Library
-from typing import Dict, Any, Protocol, List, Optional
+from typing import Protocol, List, Optional
 
 # Local Application
-from notification_listener.domain.user.models import TaigaUser
+from notification_listener.domain.user.models import BotUser, TaigaUser
 
 
 class IUserRepository(Protocol):
     """Interface for user data repository"""
     
-    def get_users_by_role_id(self, role_id: int) -> List[Dict[str, Any]]:
+    def get_users_by_role_id(self, role_id: int) -> List[BotUser]:
         """Get users with specific role
         
         Args:
             role_id: Role identifier
             
         Returns:
-            List of user records
+            List of BotUser
         """
         ...
     
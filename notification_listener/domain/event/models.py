@@ -2,6 +2,9 @@
 from dataclasses import dataclass
 from typing import Dict, Any
 
+# My Stuff
+from core import codec
+
 
 @dataclass
 class EventData:
@@ -18,10 +21,9 @@ class EventData:
         data = {}
         if 'data' in payload and payload['data']:
             if isinstance(payload['data'], str):
-                import json
                 try:
-                    data = json.loads(payload['data'])
-                except json.JSONDecodeError:
+                    data = codec.loads(payload['data'])
+                except codec.DecodeError:
                     data = {}
             else:
                 data = payload['data']
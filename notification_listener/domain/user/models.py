@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TaigaUser:
     """Taiga user data model"""
     id: int
@@ -33,3 +33,12 @@ class TaigaUser:
         elif self.username:
             return self.username
         return f'Пользователь #{self.id}'
+
+
+@dataclass(slots=True)
+class BotUser:
+    """Bot user data model (bot_users row)"""
+    id: int
+    telegram_id: Optional[int] = None
+    name: Optional[str] = None
+    full_name: Optional[str] = None
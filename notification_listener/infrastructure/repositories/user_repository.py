@@ -1,9 +1,9 @@
 # Standard Library
 import logging
-from typing import Dict, Any, List, Optional
+from typing import List, Optional
 
 # Local Application
-from notification_listener.domain.user.models import TaigaUser
+from notification_listener.domain.user.models import BotUser, TaigaUser
 from notification_listener.domain.common.interfaces import IUserRepository
 
 
@@ -19,16 +19,16 @@ class UserRepository(IUserRepository):
         self.logger = logging.getLogger("user_repository")
         self.data_storage = data_storage
     
-    def get_users_by_role_id(self, role_id: int) -> List[Dict[str, Any]]:
+    def get_users_by_role_id(self, role_id: int) -> List[BotUser]:
         """Get users with specific role
         
         Args:
             role_id: Role identifier
             
         Returns:
-            List of user records
+            List of BotUser built directly from rows
         """
-        users = self.data_storage.get_users_by_role_id(role_id)
+        users = self.data_storage.get_bot_users_by_role_id(role_id)
         if not users:
             self.logger.warning(f"No users found with role_id={role_id}")
             return []
@@ -44,38 +44,14 @@ class UserRepository(IUserRepository):
             TaigaUser instance or None if not found
         """
         try:
-            # First try direct query to users_user table
-            direct_query = """
-            SELECT id, username, full_name, username as name
-            FROM users_user
-            WHERE id = %(user_id)s
-            """
-            args = {"user_id": user_id}
-            self.logger.debug(f"Trying direct query for user_id={user_id}")
-            direct_user = self.data_storage.get_one(direct_query, args)
-            
-            if direct_user:
-                # Create TaigaUser from direct query result
-                user = TaigaUser(
-                    id=direct_user.get('id'),
-                    username=direct_user.get('username', ''),
-                    full_name=direct_user.get('full_name')
-                )
-                
-                # Now try to get telegram_id from bot_users
-                taiga_user = self.data_storage.get_taiga_user_by_id(user_id)
-                if taiga_user and taiga_user.get("telegram_id"):
-                    user.telegram_id = taiga_user.get("telegram_id")
-                
-                return user
-            else:
-                # Fallback to get_taiga_user_by_id
-                taiga_user = self.data_storage.get_taiga_user_by_id(user_id)
-                if taiga_user:
-                    return TaigaUser.from_dict(taiga_user)
-                
-                self.logger.warning(f"User with id {user_id} not found in database")
-                return None
+            # Single prepared lookup: users_user joined with bot_users,
+            # TaigaUser is built directly from the row
+            taiga_user = self.data_storage.get_taiga_user(user_id)
+            if taiga_user:
+                return taiga_user
+
+            self.logger.warning(f"User with id {user_id} not found in database")
+            return None
         except Exception as e:
             self.logger.error(f"Error getting user with id {user_id}: {str(e)}")
             return None
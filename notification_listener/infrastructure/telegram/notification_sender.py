@@ -39,9 +39,7 @@ class TelegramNotificationSender(INotificationSender):
             self.logger.warning("No scrum masters found in database")
             return []
 
-        telegram_ids = [
-            user["telegram_id"] for user in users if user.get("telegram_id")
-        ]
+        telegram_ids = [user.telegram_id for user in users if user.telegram_id]
         return telegram_ids
 
     def send_message(self, recipient_id: int, message: str) -> None:
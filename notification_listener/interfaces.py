@@ -1,5 +1,8 @@
 # Standard Library
-from typing import Dict, Any, Protocol, List
+from typing import Dict, Any, Protocol, List, Optional
+
+# Local Application
+from notification_listener.domain.user.models import BotUser, TaigaUser
 
 
 class IProcessDBNotification(Protocol):
@@ -52,6 +55,28 @@ class IDataStorage(Protocol):
         """
         ...
 
+    def get_bot_users_by_role_id(self, role_id: int) -> List[BotUser]:
+        """Get users with specific role as BotUser objects
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of BotUser
+        """
+        ...
+
+    def get_taiga_user(self, user_id: int) -> Optional[TaigaUser]:
+        """Get Taiga user as TaigaUser object
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            TaigaUser or None if not found
+        """
+        ...
+
     def get_taiga_user_by_id(self, user_id: int) -> Dict[str, Any] | None:
         """Get Taiga user by their id
 
@@ -95,3 +120,96 @@ class IDataStorage(Protocol):
             List of records
         """
         ...
+
+    def close(self) -> None:
+        """Release database connections"""
+        ...
+
+
+class IAsyncDataStorage(Protocol):
+    """Asyncio interface for data storage access, mirrors IDataStorage"""
+
+    async def get_users_by_role_id(self, role_id: int) -> List[Dict[str, Any]]:
+        """Get users with specific role
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of user records
+        """
+        ...
+
+    async def get_bot_users_by_role_id(self, role_id: int) -> List[BotUser]:
+        """Get users with specific role as BotUser objects
+
+        Args:
+            role_id: Role identifier
+
+        Returns:
+            List of BotUser
+        """
+        ...
+
+    async def get_taiga_user(self, user_id: int) -> Optional[TaigaUser]:
+        """Get Taiga user as TaigaUser object
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            TaigaUser or None if not found
+        """
+        ...
+
+    async def get_taiga_user_by_id(self, user_id: int) -> Dict[str, Any] | None:
+        """Get Taiga user by their id
+
+        Args:
+            user_id: Taiga user identifier
+
+        Returns:
+            User record or None if not found
+        """
+        ...
+
+    async def execute_query(self, query: str, args: Dict[str, Any] = None) -> None:
+        """Execute a query without returning results
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+        """
+        ...
+
+    async def get_one(
+        self, query: str, args: Dict[str, Any] = None
+    ) -> Dict[str, Any] | None:
+        """Get a single record from database
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+
+        Returns:
+            Single record or None if not found
+        """
+        ...
+
+    async def get_all(
+        self, query: str, args: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Get multiple records from database
+
+        Args:
+            query: SQL query to execute
+            args: Query parameters
+
+        Returns:
+            List of records
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release database connections"""
+        ...
@@ -1,5 +1,4 @@
 # Standard Library
-import json
 import logging
 import select
 import time
@@ -10,6 +9,7 @@ import psycopg
 from psycopg.sql import SQL, Identifier
 
 # Local Application
+from core import codec
 from notification_listener.interfaces import (
     INotificationListener,
     IProcessDBNotification,
@@ -72,9 +72,9 @@ class PostgresNotificationListener(INotificationListener):
             notification: PostgreSQL notification object
         """
         try:
-            payload = json.loads(notification.payload)
+            payload = codec.loads(notification.payload)
             self.processor.process(payload)
-        except json.JSONDecodeError:
+        except codec.DecodeError:
             self.logger.error(f"Failed to decode JSON: {notification.payload}")
         except Exception as e:
             self.logger.error(f"Error processing notification: {str(e)}")
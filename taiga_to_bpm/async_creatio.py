@@ -0,0 +1,319 @@
+"""
+Asyncio Creatio OData client.
+
+Async counterpart of `taiga_to_bpm.creatio.Creatio` built on httpx
+(`pip install taiga-to-bpm[async]`). URLs and payloads are shared with
+the sync client through `ODataDialect`, so v3, v4 and v4core are
+supported the same way. Connections are limited to CREATIO_POOL_SIZE,
+so it also bounds number of concurrent requests.
+
+Example:
+
+    async with await AsyncCreatio.connect(url, login, password, version) as creatio:
+        tasks = await asyncio.gather(
+            *(creatio.create_object("SLReceiptTask", row) for row in rows)
+        )
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import asyncio
+import json
+from copy import copy
+from typing import (
+    AsyncIterator,
+    List,
+    Sequence,
+)
+
+# Third Party Stuff
+import httpx
+
+# My Stuff
+from core.settings import settings
+
+from .creatio import REAUTH_STATUS_CODES
+from .creatio_constants import ODATA_version
+from .odata import (
+    SUPPORTED_VERSIONS,
+    ODataDialect,
+    ODataQuery,
+    contact_communication_query,
+)
+from .odata_batch import (
+    BatchRequest,
+    BatchResult,
+    build_v3_batch,
+    build_v4_batch,
+    parse_v3_batch,
+    parse_v4_batch,
+)
+
+
+def make_client(pool_size: int) -> httpx.AsyncClient:
+    """
+    httpx client with keep-alive pool of `pool_size` connections,
+    gzip responses are requested by httpx itself.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ),
+        timeout=httpx.Timeout(
+            settings.creatio_read_timeout,
+            connect=settings.creatio_connect_timeout,
+        ),
+    )
+
+
+class AsyncCreatio:
+    """
+    Use `await AsyncCreatio.connect(...)` to create logged in client.
+    Client logs in again and repeats request once on 401 or 403.
+    """
+
+    def __init__(
+        self,
+        creatio_host: str,
+        login: str,
+        password: str,
+        odata_version: ODATA_version,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.creatio_url = creatio_host
+        self.odata_version = odata_version
+        self.odata = ODataDialect(creatio_host, odata_version)
+        self.odata_service_link = self.odata.service_link
+        self.headers = copy(odata_version.value["headers"])
+        self.client = client or make_client(settings.creatio_pool_size)
+        self._login = login
+        self._password = password
+        self._auth_lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(
+        cls,
+        creatio_host: str,
+        login: str,
+        password: str,
+        odata_version: ODATA_version,
+        client: httpx.AsyncClient | None = None,
+    ) -> AsyncCreatio:
+        creatio = cls(creatio_host, login, password, odata_version, client)
+        await creatio.authenticate()
+        return creatio
+
+    async def authenticate(self) -> None:
+        """
+        Login, session cookies are kept by httpx client
+        """
+        response = await self.client.post(
+            self.odata.login_url,
+            headers={**self.headers, "BPMCSRF": ""},
+            content=json.dumps(self.odata.login_data(self._login, self._password)),
+        )
+        response_data = response.json()
+        if response_data["Code"] != 0:
+            raise Exception(response_data["Message"])
+        self.headers = {**self.headers, "BPMCSRF": response.cookies["BPMCSRF"]}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Authenticated request, see `Creatio.request`.
+        """
+        token = self.headers.get("BPMCSRF")
+        response = await self.client.request(
+            method, url, headers={**self.headers, **(headers or {})}, **kwargs
+        )
+        if response.status_code not in REAUTH_STATUS_CODES:
+            return response
+        async with self._auth_lock:
+            if self.headers.get("BPMCSRF") == token:
+                await self.authenticate()
+        return await self.client.request(
+            method, url, headers={**self.headers, **(headers or {})}, **kwargs
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> AsyncCreatio:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    async def create_object(self, object_name: str, data: dict) -> dict | None:
+        url = self.odata.collection_url(object_name)
+        response = await self.request("POST", url, content=json.dumps(data))
+        try:
+            if self.odata.is_v3:
+                return response.json().get("d")
+            return response.json()
+        except Exception as exc:
+            return {
+                "error": exc,
+                "response": response.content,
+                "url": url,
+                "data": data,
+                "ODATA_version": self.odata_version,
+                "HTTP_status_code": response.status_code,
+            }
+
+    async def create_objects(
+        self,
+        object_name: str,
+        rows: List[dict],
+        chunk_size: int = 100,
+    ) -> List[BatchResult]:
+        """
+        See `Creatio.create_objects`, chunks are sent concurrently.
+        """
+        item_url = self.odata.entity_set(object_name)
+        chunks = [
+            [
+                BatchRequest(method="POST", url=item_url, body=row)
+                for row in rows[start : start + chunk_size]
+            ]
+            for start in range(0, len(rows), chunk_size)
+        ]
+        chunk_results = await asyncio.gather(
+            *(self._send_batch(chunk) for chunk in chunks)
+        )
+        results: List[BatchResult] = []
+        for n, (chunk, batch_results) in enumerate(zip(chunks, chunk_results)):
+            by_index = {result.index: result for result in batch_results}
+            for i in range(len(chunk)):
+                result = by_index.get(i) or BatchResult(
+                    index=i, status=0, error="No response in batch"
+                )
+                result.index = n * chunk_size + i
+                results.append(result)
+        return results
+
+    async def _send_batch(self, chunk: List[BatchRequest]) -> List[BatchResult]:
+        if self.odata.is_v3:
+            body, content_type = build_v3_batch(chunk)
+            headers = {"Content-Type": content_type, "Accept": "multipart/mixed"}
+        else:
+            body = build_v4_batch(chunk)
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Prefer": "odata.continue-on-error",
+            }
+        response = await self.request(
+            "POST", self.odata.batch_url, headers=headers, content=body.encode()
+        )
+        try:
+            response.raise_for_status()
+            if self.odata.is_v3:
+                return parse_v3_batch(
+                    response.text,
+                    response.headers.get("Content-Type", ""),
+                )
+            return parse_v4_batch(response.json())
+        except Exception as exc:
+            error = f"Batch request failed: {exc}\nResponse: {response.text[:1000]}"
+            return [
+                BatchResult(index=i, status=response.status_code, error=error)
+                for i in range(len(chunk))
+            ]
+
+    async def delete_object(self, object_name: str, object_id: str) -> httpx.Response:
+        return await self.request(
+            "DELETE", self.odata.object_url(object_name, object_id)
+        )
+
+    async def get_object_collection(
+        self,
+        object_name: str,
+        parameters: List[str] = [],
+        query: ODataQuery | None = None,
+    ) -> List:
+        if self.odata_version not in SUPPORTED_VERSIONS:
+            return [None]
+        url = self.odata.collection_query_url(object_name, parameters, query)
+        response = await self.request("GET", url)
+        return self.odata.unwrap_collection(response.json())
+
+    async def iter_object_collection(
+        self,
+        object_name: str,
+        filter: str | None = None,
+        select: str | None = None,
+        orderby: str | None = "Id",
+        page_size: int = 500,
+        query: ODataQuery | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        See `Creatio.iter_object_collection`.
+        """
+        self.odata.check_supported()
+        options = self.odata.read_options(filter, select, orderby, query)
+        skip = 0
+        # items of requested page, server can split it with next links
+        received = 0
+        url: str | None = self.odata.page_url(object_name, options, page_size, skip)
+        while url:
+            response = await self.request("GET", url)
+            response.raise_for_status()
+            data = response.json()
+            items = self.odata.unwrap_collection(data)
+            for item in items:
+                yield item
+            skip += len(items)
+            received += len(items)
+            url = self.odata.next_link(data)
+            if not url and received >= page_size:
+                url = self.odata.page_url(object_name, options, page_size, skip)
+                received = 0
+
+    async def get_object_by_id(
+        self,
+        object_name: str,
+        object_id: str,
+        query: ODataQuery | None = None,
+    ):
+        if self.odata_version not in SUPPORTED_VERSIONS:
+            return None
+        url = self.odata.object_url(object_name, object_id, query)
+        response = await self.request("GET", url)
+        return self.odata.unwrap_object(response.json())
+
+    # Typical implementations
+
+    async def get_contact_by_id(
+        self,
+        contact_id: str,
+        select: Sequence[str] = (),
+    ) -> dict | None:
+        return await self.get_object_by_id(
+            object_name="Contact",
+            object_id=contact_id,
+            query=ODataQuery(select=select),
+        )
+
+    async def get_creatio_contact_id(
+        self, creatio_channel_id: str, number: str
+    ) -> str | None:
+        result = await self.get_object_collection(
+            object_name="ContactCommunication",
+            query=contact_communication_query(creatio_channel_id, number),
+        )
+        if not result or result[0] is None:
+            return None
+        return result[0]["ContactId"]
+
+    async def post_receipt(self, board_creatio_id):
+        return await self.create_object(
+            "SLReceipt", {"SLTrelloDeskId": board_creatio_id}
+        )
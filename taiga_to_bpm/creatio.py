@@ -1,35 +1,154 @@
 # Standard Library
 import json
-from typing import List
+from copy import copy
+from threading import Lock
+from typing import (
+    Iterator,
+    List,
+    Sequence,
+)
 
 # Third Party Stuff
 import requests
+from requests.adapters import HTTPAdapter
+
+# My Stuff
+from core.settings import settings
 
 from .creatio_constants import ODATA_version
+from .odata import (
+    SUPPORTED_VERSIONS,
+    ODataDialect,
+    ODataQuery,
+    contact_communication_query,
+)
+from .odata_batch import (
+    BatchRequest,
+    BatchResult,
+    build_v3_batch,
+    build_v4_batch,
+    parse_v3_batch,
+    parse_v4_batch,
+)
+from .rate_limit import host_limiter
+
+# Responses meaning that session cookie or BPMCSRF token is not valid anymore
+REAUTH_STATUS_CODES = (401, 403)
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """
+    HTTP session with keep-alive connection pool of `pool_size`
+    connections per host and compressed responses.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
 
 
 class Creatio:
-    def __init__(self, creatio_host, login, password, odata_version):
+    """
+    Creatio OData client. All requests go through one `requests.Session`,
+    so connections are reused. Pool size and timeouts are configured
+    with settings (environment variables):
+
+        CREATIO_POOL_SIZE - keep-alive connections per host (default 10)
+        CREATIO_CONNECT_TIMEOUT - seconds (default 5)
+        CREATIO_READ_TIMEOUT - seconds (default 60)
+
+    Client logs in once and keeps session cookies and BPMCSRF token.
+    When Creatio answers 401 or 403 (session expired), client logs in
+    again and repeats the request once.
+    """
+
+    def __init__(
+        self,
+        creatio_host,
+        login,
+        password,
+        odata_version: ODATA_version,
+        session: requests.Session | None = None,
+    ):
         self.creatio_url = creatio_host
         self.odata_version = odata_version
-        self.odata_service_link = self.creatio_url + odata_version.value["service_path"]
-        self.headers = odata_version.value["headers"]
-        done, text = self.forms_auth(login, password)
-        if done:
-            self.headers["BPMCSRF"] = text["BPMCSRF"]
-            self.cookies = text
-        else:
+        self.odata = ODataDialect(creatio_host, odata_version)
+        self.odata_service_link = self.odata.service_link
+        self.headers = copy(odata_version.value["headers"])
+        self.session = session or make_session(settings.creatio_pool_size)
+        self.timeout = (settings.creatio_connect_timeout, settings.creatio_read_timeout)
+        self._login = login
+        self._password = password
+        self._auth_lock = Lock()
+        self.authenticate()
+
+    def authenticate(self) -> None:
+        """
+        Login and keep session cookies and BPMCSRF token
+        """
+        done, text = self.forms_auth(self._login, self._password)
+        if not done:
             raise Exception(text)
+        self.cookies = text
+        self.headers = {**self.headers, "BPMCSRF": text["BPMCSRF"]}
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Authenticated request. Logs in again and repeats request
+        once if session is expired. Requests to one host are limited
+        to CREATIO_RATE_LIMIT per second, see taiga_to_bpm.rate_limit.
+        `headers` are added to (or replace) default OData headers.
+        """
+
+        def send() -> requests.Response:
+            if limiter:
+                limiter.acquire()
+            return self.session.request(
+                method,
+                url,
+                headers={**self.headers, **(headers or {})},
+                cookies=self.cookies,
+                timeout=self.timeout,
+                **kwargs,
+            )
+
+        limiter = host_limiter(url)
+        token = self.headers.get("BPMCSRF")
+        response = send()
+        if response.status_code not in REAUTH_STATUS_CODES:
+            return response
+        with self._auth_lock:
+            # other thread could already log in again
+            if self.headers.get("BPMCSRF") == token:
+                self.authenticate()
+        return send()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "Creatio":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
 
     def forms_auth(self, login, password):
         """Аутентификация ODATA"""
-        url = f"{self.creatio_url}/ServiceModel/AuthService.svc/Login"
-        dict_data = {
-            "UserName": login,
-            "UserPassword": password,
-        }
-        json_data = json.dumps(dict_data)
-        response = requests.post(url=url, headers=self.headers, data=json_data)
+        json_data = json.dumps(self.odata.login_data(login, password))
+        response = self.session.post(
+            url=self.odata.login_url,
+            headers={**self.headers, "BPMCSRF": ""},
+            data=json_data,
+            timeout=self.timeout,
+        )
 
         response_data = response.json()
         if response_data["Code"] == 0:
@@ -39,19 +158,15 @@ class Creatio:
 
     def create_object(self, object_name: str, data: dict) -> dict | None:
         """CREATE запрос в Creatio"""
-        if self.odata_version == ODATA_version.v3:
-            url = self.odata_service_link + f"/{object_name}Collection"
-        else:
-            url = self.odata_service_link + f"/{object_name}"
+        url = self.odata.collection_url(object_name)
         json_data = json.dumps(data)
-        response = requests.post(
-            url=url,
-            headers=self.headers,
+        response = self.request(
+            "POST",
+            url,
             data=json_data,
-            cookies=self.cookies,
         )
         try:
-            if self.odata_version == ODATA_version.v3:
+            if self.odata.is_v3:
                 try:
                     object = json.loads(response.content)["d"]
                 except KeyError:
@@ -72,86 +187,159 @@ class Creatio:
 
         return object
 
+    def create_objects(
+        self,
+        object_name: str,
+        rows: List[dict],
+        chunk_size: int = 100,
+    ) -> List[BatchResult]:
+        """
+        Create objects with OData $batch requests of `chunk_size` rows.
+        Rows are created independently, result of every row is returned
+        in the same order (BatchResult.index is row index):
+
+            results = creatio.create_objects("SLReceiptTask", rows)
+            failed = [result for result in results if not result.ok]
+        """
+        url = self.odata.batch_url
+        item_url = self.odata.entity_set(object_name)
+        results: List[BatchResult] = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = [
+                BatchRequest(method="POST", url=item_url, body=row)
+                for row in rows[start : start + chunk_size]
+            ]
+            chunk_results = {
+                result.index: result for result in self._send_batch(url, chunk)
+            }
+            for i in range(len(chunk)):
+                result = chunk_results.get(i) or BatchResult(
+                    index=i, status=0, error="No response in batch"
+                )
+                result.index = start + i
+                results.append(result)
+        return results
+
+    def _send_batch(self, url: str, chunk: List[BatchRequest]) -> List[BatchResult]:
+        if self.odata.is_v3:
+            body, content_type = build_v3_batch(chunk)
+            headers = {"Content-Type": content_type, "Accept": "multipart/mixed"}
+        else:
+            body = build_v4_batch(chunk)
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Prefer": "odata.continue-on-error",
+            }
+        response = self.request("POST", url, headers=headers, data=body.encode())
+        try:
+            response.raise_for_status()
+            if self.odata.is_v3:
+                return parse_v3_batch(
+                    response.text,
+                    response.headers.get("Content-Type", ""),
+                )
+            return parse_v4_batch(response.json())
+        except Exception as exc:
+            error = f"Batch request failed: {exc}\nResponse: {response.text[:1000]}"
+            return [
+                BatchResult(index=i, status=response.status_code, error=error)
+                for i in range(len(chunk))
+            ]
+
     def delete_object(self, object_name: str, object_id: str) -> requests.Response:
         """DELETE запрос к Creatio"""
-        match self.odata_version:
-            case ODATA_version.v3:
-                url = (
-                    self.odata_service_link
-                    + f"/{object_name}Collection(guid'{object_id}')"
-                )
-            case ODATA_version.v4 | ODATA_version.v4core:
-                url = self.odata_service_link + f"/{object_name}({object_id})"
-            case _:
-                raise Exception(f"ODATA version is not supported: {self.odata_version}")
-
-        response = requests.delete(
-            url=url,
-            headers=self.headers,
-            cookies=self.cookies,
-        )
-        return response
+        return self.request("DELETE", self.odata.object_url(object_name, object_id))
 
     def get_object_collection(
-        self, object_name: str, parameters: List[str] = []
+        self,
+        object_name: str,
+        parameters: List[str] = [],
+        query: ODataQuery | None = None,
     ) -> List:
-        _params: str = ""
-        for parameter in parameters:
-            _params += f"?${parameter}"
-
-        match self.odata_version:
-            case ODATA_version.v3:
-                url = self.odata_service_link + f"/{object_name}Collection{_params}"
-                response = requests.get(
-                    url=url,
-                    headers=self.headers,
-                    cookies=self.cookies,
-                )
-                result = json.loads(response.content)["d"]["results"]
-            case ODATA_version.v4 | ODATA_version.v4core:
-                url = self.odata_service_link + f"/{object_name}{_params}"
-                response = requests.get(
-                    url=url,
-                    headers=self.headers,
-                    cookies=self.cookies,
-                )
-                result = json.loads(response.content)["value"]
-            case _:
-                result = [None]
-        return result
-
-    def get_object_by_id(self, object_name: str, object_id: str):
-        match self.odata_version:
-            case ODATA_version.v3:
-                url = (
-                    self.odata_service_link
-                    + f"/{object_name}Collection(guid'{object_id}')"
-                )
-                response = requests.get(
-                    url=url,
-                    headers=self.headers,
-                    cookies=self.cookies,
-                )
-                result = json.loads(response.content)["d"]
-            case ODATA_version.v4 | ODATA_version.v4core:
-                url = self.odata_service_link + f"/{object_name}({object_id})"
-                response = requests.get(
-                    url=url,
-                    headers=self.headers,
-                    cookies=self.cookies,
-                )
-                result = json.loads(response.content)
-            case _:
-                result = None
-        return result
+        """
+        Objects of one response. Use `query` to select fields and
+        filter objects, `parameters` are raw OData options without `$`,
+        for example ["filter=Number eq '1'", "top=10"].
+        Use `iter_object_collection` for large collections.
+        """
+        if self.odata_version not in SUPPORTED_VERSIONS:
+            return [None]
+        url = self.odata.collection_query_url(object_name, parameters, query)
+        response = self.request("GET", url)
+        return self.odata.unwrap_collection(json.loads(response.content))
+
+    def iter_object_collection(
+        self,
+        object_name: str,
+        filter: str | None = None,
+        select: str | None = None,
+        orderby: str | None = "Id",
+        page_size: int = 500,
+        query: ODataQuery | None = None,
+    ) -> Iterator[dict]:
+        """
+        Generator of all collection objects, loaded by pages of `page_size`.
+        Next page is requested by server next link (`@odata.nextLink`,
+        `d.__next`) or with $skip when server doesn't send it, so
+        `orderby` should be unique to get stable pages.
+        `query` replaces filter, select and orderby when it is given.
+
+            for contact in creatio.iter_object_collection("Contact", select="Id"):
+                ...
+        """
+        self.odata.check_supported()
+        options = self.odata.read_options(filter, select, orderby, query)
+        skip = 0
+        # items of requested page, server can split it with next links
+        received = 0
+        url: str | None = self.odata.page_url(object_name, options, page_size, skip)
+        while url:
+            response = self.request("GET", url)
+            response.raise_for_status()
+            data = json.loads(response.content)
+            items = self.odata.unwrap_collection(data)
+            yield from items
+            skip += len(items)
+            received += len(items)
+            url = self.odata.next_link(data)
+            if not url and received >= page_size:
+                url = self.odata.page_url(object_name, options, page_size, skip)
+                received = 0
+
+    def get_object_by_id(
+        self,
+        object_name: str,
+        object_id: str,
+        query: ODataQuery | None = None,
+    ):
+        """
+        Object by Id, `query` sets $select and $expand:
+
+            creatio.get_object_by_id("Contact", id, ODataQuery(select=["Name"]))
+        """
+        if self.odata_version not in SUPPORTED_VERSIONS:
+            return None
+        url = self.odata.object_url(object_name, object_id, query)
+        response = self.request("GET", url)
+        return self.odata.unwrap_object(json.loads(response.content))
 
     # Typical implementations
 
-    def get_contact_by_id(self, contact_id: str) -> dict | None:
+    def get_contact_by_id(
+        self,
+        contact_id: str,
+        select: Sequence[str] = (),
+    ) -> dict | None:
         """
-        Get contact object (dict type) by Id column
+        Get contact object (dict type) by Id column,
+        only `select` fields if they are given
         """
-        return self.get_object_by_id(object_name="Contact", object_id=contact_id)
+        return self.get_object_by_id(
+            object_name="Contact",
+            object_id=contact_id,
+            query=ODataQuery(select=select),
+        )
 
     def get_creatio_contact_id(
         self, creatio_channel_id: str, number: str
@@ -159,28 +347,13 @@ class Creatio:
         """
         Get contactId by phone number or other communication option
         """
-        parameters = []
-        match self.odata_version:
-            case ODATA_version.v3:
-                parameters = [
-                    (
-                        f"filter=CommunicationType/Id eq guid'{creatio_channel_id}' and"
-                        f" Number eq '{number}'"
-                    )
-                ]
-            case ODATA_version.v4 | ODATA_version.v4core:
-                parameters = [
-                    f"filter=CommunicationType/Id "
-                    f"eq {creatio_channel_id} and Number eq '{number}'"
-                ]
         result = self.get_object_collection(
             object_name="ContactCommunication",
-            parameters=parameters,
-        )[0]
-        if result is None:
+            query=contact_communication_query(creatio_channel_id, number),
+        )
+        if not result or result[0] is None:
             return None
-        else:
-            return result["ContactId"]
+        return result[0]["ContactId"]
 
     def post_receipt(self, board_creatio_id):
         """Создать экземпляр SLReceipt  в Creatio"""
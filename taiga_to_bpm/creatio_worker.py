@@ -1,19 +1,28 @@
 from __future__ import annotations
 
 # Standard Library
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from os import environ
+from threading import Lock
+from time import monotonic
 from typing import (
+    Dict,
     List,
     Optional,
+    Tuple,
 )
-
-# Third Party Stuff
-from psycopg import connect
-from psycopg.rows import TupleRow
+from uuid import uuid4
 
 # My Stuff
-from db.db_worker import execute_query
+from core.settings import settings
+from db.db_worker import (
+    execute_many,
+    execute_pipeline,
+    execute_query,
+    get_all,
+    get_one,
+    transaction,
+)
 
 from .creatio import Creatio
 from .creatio_constants import ODATA_version
@@ -33,65 +42,161 @@ def create_receipt(project_id: int) -> Receipt:
     return receipt
 
 
-def get_creatio_settings() -> List[TupleRow]:
-    db_url = environ.get("DB_URL")
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
+BPM_SETTINGS_QUERY = """
 SELECT
-	url_settings.value as url,
-	user_settings.value as user,
-	pass_settings.value as pass,
-	api_settings.value as api_version
-FROM
-	bpm_settings as url_settings,
-	bpm_settings as user_settings,
-	bpm_settings as pass_settings,
-	bpm_settings as api_settings
-WHERE
-	url_settings."key" = 'bpm_url'
-	AND user_settings."key" = 'bpm_user'
-	AND pass_settings."key" = 'bpm_password'
-	AND api_settings."key" = 'bpm_version';
-                           """
-            )
-            return cursor.fetchall()
+    max(value) FILTER (WHERE "key" = 'bpm_url') AS url,
+    max(value) FILTER (WHERE "key" = 'bpm_user') AS user,
+    max(value) FILTER (WHERE "key" = 'bpm_password') AS pass,
+    max(value) FILTER (WHERE "key" = 'bpm_version') AS api_version
+FROM bpm_settings
+WHERE "key" IN ('bpm_url', 'bpm_user', 'bpm_password', 'bpm_version');
+"""
+
+
+@dataclass(frozen=True)
+class BpmSettings:
+    url: str
+    user: str
+    password: str
+    api_version: str
+
+
+_bpm_settings: Optional[Tuple[float, BpmSettings]] = None
+_bpm_settings_lock = Lock()
+
+
+def get_creatio_settings(refresh: bool = False) -> BpmSettings:
+    """
+    Creatio connection settings from bpm_settings table, read with one
+    scan and cached for BPM_SETTINGS_TTL seconds.
+    Use `refresh=True` to read them again right now.
+    """
+    global _bpm_settings
+    with _bpm_settings_lock:
+        if (
+            not refresh
+            and _bpm_settings
+            and monotonic() - _bpm_settings[0] < settings.bpm_settings_ttl
+        ):
+            return _bpm_settings[1]
+        row = get_one(BPM_SETTINGS_QUERY)
+        if not row or not all(row):
+            raise ValueError("BPM settings not found")
+        bpm_settings = BpmSettings(*row)
+        _bpm_settings = (monotonic(), bpm_settings)
+        return bpm_settings
+
+
+_clients: Dict[BpmSettings, Creatio] = {}
+_clients_lock = Lock()
 
 
-def creatio_connection() -> Creatio:
-    bpm_settings = get_creatio_settings()[0]
-    if not bpm_settings:
-        raise ValueError("BPM settings not found")
+def creatio_connection(refresh: bool = False) -> Creatio:
+    """
+    Shared Creatio client. It logs in on first use and is reused
+    by the whole process (it logs in again itself when session expires).
+    New client is created when bpm_settings are changed,
+    `refresh=True` re-reads them from database.
+    """
+    bpm_settings = get_creatio_settings(refresh)
+    client = _clients.get(bpm_settings)
+    if client:
+        return client
+    with _clients_lock:
+        client = _clients.get(bpm_settings)
+        if not client:
+            for old_client in _clients.values():
+                old_client.close()
+            _clients.clear()
+            client = _clients[bpm_settings] = _new_creatio(bpm_settings)
+        return client
+
+
+def _new_creatio(bpm_settings: BpmSettings) -> Creatio:
     api_version_mapping = {
         "v3": ODATA_version.v3,
         "v4": ODATA_version.v4,
         "v4core": ODATA_version.v4core,
     }
-    bpm_api_version = bpm_settings[3]
+    bpm_api_version = bpm_settings.api_version
     if bpm_api_version in api_version_mapping:
         api_version = api_version_mapping[bpm_api_version]
     else:
         raise ValueError(f"Unknown API version: {bpm_api_version}")
     return Creatio(
-        creatio_host=bpm_settings[0],
-        login=bpm_settings[1],
-        password=bpm_settings[2],
+        creatio_host=bpm_settings.url,
+        login=bpm_settings.user,
+        password=bpm_settings.password,
         odata_version=api_version,
     )
 
 
+OPEN_RECEIPT_QUERY = """
+SELECT receipt_guid, receipt_url
+FROM bpm_receipts
+WHERE project_id = %(project_id)s AND finished_at IS NULL;
+"""
+
+CLAIM_RECEIPT_QUERY = """
+INSERT INTO bpm_receipts (receipt_guid, project_id, receipt_url)
+VALUES (%(receipt_guid)s, %(project_id)s, %(receipt_url)s)
+ON CONFLICT (project_id) WHERE finished_at IS NULL DO NOTHING
+RETURNING receipt_guid;
+"""
+
+ABANDON_RECEIPT_QUERY = """
+DELETE FROM bpm_receipts
+WHERE receipt_guid = %(receipt_guid)s AND finished_at IS NULL;
+"""
+
+FINISH_RECEIPT_QUERY = """
+UPDATE bpm_receipts
+SET finished_at = now()
+WHERE receipt_guid = %(receipt_guid)s;
+"""
+
+PUSHED_TASKS_QUERY = """
+SELECT task_id, task_guid
+FROM bpm_receipt_tasks
+WHERE receipt_guid = %(receipt_guid)s;
+"""
+
+SAVE_PUSHED_TASK_QUERY = """
+INSERT INTO bpm_receipt_tasks (receipt_guid, task_id, task_guid)
+VALUES (%(receipt_guid)s, %(task_id)s, %(task_guid)s)
+ON CONFLICT (receipt_guid, task_id) DO NOTHING;
+"""
+
+
 @dataclass
 class Receipt:
+    """
+    SLReceipt in Creatio.
+
+    Receipt created with `open_for_project` is checkpointed in bpm_receipts
+    (db/sql_scripts/bpm_receipts.sql): every created task is recorded in
+    bpm_receipt_tasks, so if pushing fails, next run for the project adds
+    only missing tasks to the same receipt until `finish_query` is executed.
+    """
+
     guid: str
     url: str
+    project_id: Optional[int] = None
 
     @classmethod
-    def new(cls, desk_guid: str) -> Receipt:
-        creatio = creatio_connection()
+    def new(
+        cls,
+        desk_guid: str,
+        creatio: Optional[Creatio] = None,
+        guid: Optional[str] = None,
+    ) -> Receipt:
+        """
+        Create SLReceipt in Creatio, with given Id when `guid` is set.
+        """
+        creatio = creatio or creatio_connection()
         dict_data = {"SLTrelloDeskId": desk_guid}
+        if guid:
+            dict_data["Id"] = guid
         print(f"Creating receipt: {dict_data=}")
         receipt_odata_dict = creatio.create_object("SLReceipt", dict_data)
         if not receipt_odata_dict:
@@ -106,14 +211,127 @@ class Receipt:
         except KeyError:
             pass
         receipt_id = str(receipt_odata_dict["Id"])
-        return cls(
-            guid=receipt_id,
-            url=(
-                f"{creatio.creatio_url}/Nui/ViewModule.aspx#CardModuleV2"
-                f"/SLReceipt1Page/edit/{receipt_id}"
-            ),
+        return cls(guid=receipt_id, url=cls.page_url(creatio, receipt_id))
+
+    @staticmethod
+    def page_url(creatio: Creatio, guid: str) -> str:
+        """
+        Receipt page in Creatio UI
+        """
+        return (
+            f"{creatio.creatio_url}/Nui/ViewModule.aspx#CardModuleV2"
+            f"/SLReceipt1Page/edit/{guid}"
         )
 
+    @classmethod
+    def get_open(cls, project_id: int) -> Optional[Receipt]:
+        """
+        Not finished checkpointed receipt of project
+        """
+        row = get_one(OPEN_RECEIPT_QUERY, {"project_id": project_id})
+        if not row:
+            return None
+        return cls(guid=str(row[0]), url=row[1], project_id=project_id)
+
+    @classmethod
+    def open_for_project(
+        cls,
+        project_id: int,
+        desk_guid: str,
+        creatio: Optional[Creatio] = None,
+    ) -> Receipt:
+        """
+        Not finished receipt of project or new checkpointed receipt.
+        Receipt deleted in Creatio is abandoned and a new one is created.
+
+        The bpm_receipts row is claimed before the receipt is created in
+        Creatio and committed after it: concurrent run waits on the open
+        receipt unique index and then resumes the same receipt, failed
+        creation rolls the claim back, so there are no orphan receipts.
+        """
+        creatio = creatio or creatio_connection()
+        receipt = cls.get_open(project_id)
+        if receipt:
+            if receipt.exists(creatio):
+                return receipt
+            print(f"Receipt {receipt.guid} not found in Creatio, abandoning it")
+            receipt.abandon()
+        guid = str(uuid4())
+        args = {
+            "project_id": project_id,
+            "receipt_guid": guid,
+            "receipt_url": cls.page_url(creatio, guid),
+        }
+        with transaction() as cursor:
+            cursor.execute(CLAIM_RECEIPT_QUERY, args)
+            if cursor.fetchone():
+                receipt = cls.new(desk_guid, creatio, guid)
+                if receipt.guid.lower() != guid:
+                    raise ValueError(f"Creatio ignored receipt Id {guid}: {receipt}")
+                receipt.project_id = project_id
+                return receipt
+        # other run has created the receipt meanwhile
+        receipt = cls.get_open(project_id)
+        if not receipt:
+            raise ValueError(f"Receipt of project {project_id} not created")
+        return receipt
+
+    def exists(self, creatio: Optional[Creatio] = None) -> bool:
+        """
+        False only when Creatio answers that receipt is not found
+        """
+        creatio = creatio or creatio_connection()
+        url = creatio.odata.object_url("SLReceipt", self.guid)
+        return creatio.request("GET", url).status_code != 404
+
+    def abandon(self) -> None:
+        """
+        Forget not finished checkpointed receipt together with its
+        pushed tasks, next `open_for_project` creates a new receipt.
+        Use it for receipt stuck in a state that can't be resumed.
+        """
+        execute_query(ABANDON_RECEIPT_QUERY, {"receipt_guid": self.guid})
+
+    def pushed_tasks(self) -> Dict[int, str]:
+        """
+        Guids of tasks already created in checkpointed receipt by task id
+        """
+        if self.project_id is None:
+            return {}
+        rows = get_all(PUSHED_TASKS_QUERY, {"receipt_guid": self.guid}) or []
+        return {row[0]: str(row[1]) for row in rows}
+
+    def _checkpoint(self, tasks: List[Task]) -> None:
+        if self.project_id is None:
+            return
+        execute_many(
+            SAVE_PUSHED_TASK_QUERY,
+            [
+                {"receipt_guid": self.guid, "task_id": task.id, "task_guid": task.guid}
+                for task in tasks
+                if task.guid
+            ],
+        )
+
+    def _try_checkpoint(self, tasks: List[Task]) -> Optional[str]:
+        """
+        Checkpoint created tasks, error text if it failed. Tasks are
+        in Creatio anyway, so the error is reported per task instead of
+        hiding results of the other tasks.
+        """
+        try:
+            self._checkpoint(tasks)
+        except Exception as e:
+            return f"Task created in Creatio, but checkpoint failed: {e}"
+        return None
+
+    def finish_query(self) -> Tuple[str, dict]:
+        """
+        Query marking checkpointed receipt as finished, execute it in the same
+        transaction with tasks status update, see `execute_pipeline`.
+        """
+        return FINISH_RECEIPT_QUERY, {"receipt_guid": self.guid}
+
     @classmethod
     def get_from_url(cls, url: str) -> Receipt:
         receipt_id = url.split("/")[-1]
@@ -122,24 +340,111 @@ class Receipt:
             url=url,
         )
 
+    def add_tasks(
+        self,
+        tasks: List[Task],
+        creatio: Optional[Creatio] = None,
+        mode: Optional[str] = None,
+    ) -> List[PushResult]:
+        """
+        Create receipt tasks in Creatio, sets `guid` of created tasks.
+        Returns result of every task, failed task doesn't stop the others.
+        Tasks already created in checkpointed receipt are not pushed again.
+
+        mode (CREATIO_PUSH_MODE setting by default):
+            batch - $batch requests of CREATIO_BATCH_SIZE tasks
+            concurrent - request per task, CREATIO_CONCURRENCY at once
+        """
+        creatio = creatio or creatio_connection()
+        mode = mode or settings.creatio_push_mode
+        pushed = self.pushed_tasks()
+        results: List[PushResult] = []
+        missing: List[Task] = []
+        for task in tasks:
+            if task.id in pushed:
+                task.guid = pushed[task.id]
+                results.append(PushResult(task=task))
+            else:
+                missing.append(task)
+        match mode:
+            case "batch":
+                return results + self._add_tasks_batch(missing, creatio)
+            case "concurrent":
+                return results + self._add_tasks_concurrent(missing, creatio)
+            case _:
+                raise ValueError(f"Unknown push mode: {mode}")
+
+    def _add_tasks_batch(self, tasks: List[Task], creatio: Creatio) -> List[PushResult]:
+        results: List[PushResult] = []
+        valid_tasks: List[Task] = []
+        rows: List[dict] = []
+        for task in tasks:
+            try:
+                rows.append(task.creatio_data(self.guid))
+                valid_tasks.append(task)
+            except ValueError as e:
+                results.append(PushResult(task=task, error=str(e)))
+        chunk_size = settings.creatio_batch_size
+        for start in range(0, len(rows), chunk_size):
+            chunk_tasks = valid_tasks[start : start + chunk_size]
+            batch_results = creatio.create_objects(
+                object_name="SLReceiptTask",
+                rows=rows[start : start + chunk_size],
+                chunk_size=chunk_size,
+            )
+            created: List[Task] = []
+            for task, result in zip(chunk_tasks, batch_results):
+                if result.ok and result.data and result.data.get("Id"):
+                    task.guid = str(result.data["Id"])
+                    print(f"Created task {task.ref} - {task.guid}")
+                    created.append(task)
+                else:
+                    results.append(
+                        PushResult(task=task, error=result.error or "No Id in response")
+                    )
+            error = self._try_checkpoint(created)
+            results += [PushResult(task=task, error=error) for task in created]
+        return results
+
+    def _add_tasks_concurrent(
+        self,
+        tasks: List[Task],
+        creatio: Creatio,
+    ) -> List[PushResult]:
+        def push(task: Task) -> PushResult:
+            try:
+                task.push_to_creatio(self.guid, creatio)
+            except Exception as e:
+                return PushResult(task=task, error=str(e))
+            return PushResult(task=task, error=self._try_checkpoint([task]))
+
+        with ThreadPoolExecutor(
+            max_workers=settings.creatio_concurrency,
+            thread_name_prefix="creatio_push",
+        ) as executor:
+            return list(executor.map(push, tasks))
+
     def delete(self, db_url) -> None:
         """
         Use this method to rollback receipt
         only if you have access to Creatio database
         """
         args = {"receipt_id": self.guid}
-        query = """
+        delete_tasks_query = """
             DELETE FROM public."SLReceiptTask"
             WHERE "SLReceiptId" = %(receipt_id)s
         """
-        execute_query(query, args, db_url=db_url)
-
-        # delete receipt
-        query = """
+        delete_receipt_query = """
             DELETE FROM public."SLReceipt"
             WHERE "Id" = %(receipt_id)s
         """
-        execute_query(query, args, db_url=db_url)
+        execute_pipeline(
+            [
+                (delete_tasks_query, args),
+                (delete_receipt_query, args),
+            ],
+            db_url=db_url,
+        )
 
 
 @dataclass
@@ -158,9 +463,37 @@ class Task:
     project_id: Optional[int] = None
     guid: Optional[str] = None
 
-    def push_to_creatio(self, receipt_id: str) -> str:
+    def push_to_creatio(
+        self,
+        receipt_id: str,
+        creatio: Optional[Creatio] = None,
+    ) -> str:
         """
         return: task_id - guid as string
+        Pass `creatio` client when pushing several tasks,
+        otherwise shared client from `creatio_connection` is used.
+        """
+        data = self.creatio_data(receipt_id)
+        creatio = creatio or creatio_connection()
+        created_task = creatio.create_object(
+            object_name="SLReceiptTask",
+            data=data,
+        )
+        if not created_task:
+            raise ValueError(f"Task not created: {data=}")
+        try:
+            error = created_task["error"]
+            raise ValueError(f"Error creating task {error}\nSent data: {data}")
+        except KeyError:
+            pass
+        self.guid = created_task["Id"]
+        print(f"Created task {self.ref} - {self.guid}")
+        assert self.guid
+        return self.guid
+
+    def creatio_data(self, receipt_id: str) -> dict:
+        """
+        SLReceiptTask object for Creatio
         """
         if not self.bpm_user_guid:
             raise ValueError(
@@ -173,7 +506,7 @@ class Task:
         hours = round(minutes_full // 60)
         minutes = round(minutes_full % 60)
 
-        data = {
+        return {
             "SLName": self.subject,
             "SLExecutorId": self.bpm_user_guid,
             "SLHours": hours,
@@ -181,32 +514,36 @@ class Task:
             "SLCardLink": self.url,
             "SLReceiptId": receipt_id,
         }
-        creatio = creatio_connection()
-        created_task = creatio.create_object(
-            object_name="SLReceiptTask",
-            data=data,
-        )
-        if not created_task:
-            raise ValueError(f"Task not created: {data=}")
-        try:
-            error = created_task["error"]
-            raise ValueError(f"Error creating task {error}\nSent data: {data}")
-        except KeyError:
-            pass
-        self.guid = created_task["Id"]
-        print(f"Created task {self.ref} - {self.guid}")
-        assert self.guid
-        return self.guid
+
+
+@dataclass
+class PushResult:
+    """
+    Result of creating one task in Creatio
+    """
+
+    task: Task
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def push_errors(results: List[PushResult]) -> str:
+    """
+    Text about failed tasks, empty string if all tasks were created
+    """
+    failed = [result for result in results if not result.ok]
+    if not failed:
+        return ""
+    lines = [f"{len(failed)} of {len(results)} tasks failed:"]
+    lines += [f"Task {result.task.ref}: {result.error}" for result in failed]
+    return "\n".join(lines)
 
 
 def get_tasks(project_id: int) -> List[Task]:
-    db_url = environ.get("DB_URL")
-    if not db_url:
-        raise ValueError("DB_URL environment variable not set")
-    with connect(conninfo=db_url) as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
+    query = """
 SELECT
 	task.id, -- 0
 	subject, -- 1
@@ -232,27 +569,26 @@ FROM
 WHERE
 	status_id = fields.topay_status_id
     AND task.project_id = %(project_id)s;
-""",
-                {"project_id": project_id},
+"""
+    args = {"project_id": project_id}
+    task_rows = get_all(query, args) or []
+    tasks = []
+    for task_row in task_rows:
+        tasks.append(
+            Task(
+                id=task_row[0],
+                subject=task_row[1],
+                bpm_user_guid=task_row[2],
+                desk_guid=task_row[3],
+                estimate=task_row[4],
+                hours=task_row[5] or 0.0,
+                minutes=task_row[6] or 0.0,
+                ref=task_row[7],
+                assigned_to_id=task_row[8],
+                url=f"https://taiga.smartist.dev/project/{task_row[9]}/task/{task_row[7]}",
+                user_full_name=task_row[10],
             )
-            task_rows = cursor.fetchall()
-            tasks = []
-            for task_row in task_rows:
-                tasks.append(
-                    Task(
-                        id=task_row[0],
-                        subject=task_row[1],
-                        bpm_user_guid=task_row[2],
-                        desk_guid=task_row[3],
-                        estimate=task_row[4],
-                        hours=task_row[5] or 0.0,
-                        minutes=task_row[6] or 0.0,
-                        ref=task_row[7],
-                        assigned_to_id=task_row[8],
-                        url=f"https://taiga.smartist.dev/project/{task_row[9]}/task/{task_row[7]}",
-                        user_full_name=task_row[10],
-                    )
-                )
-            if not tasks or len(tasks) == 0:
-                raise ValueError("Tasks not found")
-            return tasks
+        )
+    if not tasks or len(tasks) == 0:
+        raise ValueError("Tasks not found")
+    return tasks
@@ -0,0 +1,276 @@
+"""
+URLs and payload shapes of Creatio OData versions.
+
+Shared by sync `Creatio` and `AsyncCreatio` clients, so both build
+the same requests for v3, v4 and v4core.
+
+`ODataQuery` describes $select, $expand and $filter of a read, values
+of filter conditions are escaped for the dialect when query is rendered:
+
+    query = (
+        ODataQuery(select=["ContactId"], top=1)
+        .where("CommunicationType/Id", Guid(channel_id))
+        .where("Number", number)
+    )
+    creatio.get_object_collection("ContactCommunication", query=query)
+"""
+
+from __future__ import annotations
+
+# Standard Library
+from dataclasses import (
+    dataclass,
+    field,
+    replace,
+)
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from uuid import UUID
+from urllib.parse import (
+    quote,
+    urljoin,
+)
+
+from .creatio_constants import ODATA_version
+
+SUPPORTED_VERSIONS = (ODATA_version.v3, ODATA_version.v4, ODATA_version.v4core)
+
+FILTER_OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le")
+
+
+class Guid(str):
+    """
+    String value that is rendered as Guid literal in filters
+    """
+
+
+@dataclass(frozen=True)
+class ODataQuery:
+    """
+    Read options. Conditions added with `where` are joined with `and`.
+    """
+
+    select: Sequence[str] = ()
+    expand: Sequence[str] = ()
+    orderby: Optional[str] = None
+    top: Optional[int] = None
+    conditions: Tuple[Tuple[str, str, Any], ...] = field(default=())
+
+    def where(self, name: str, value: Any, operator: str = "eq") -> ODataQuery:
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {operator}")
+        return replace(self, conditions=(*self.conditions, (name, operator, value)))
+
+    def options(self, dialect: ODataDialect) -> Dict[str, Any]:
+        """
+        Options for `ODataDialect.query_string`
+        """
+        conditions = [
+            f"{name} {operator} {dialect.literal(value)}"
+            for name, operator, value in self.conditions
+        ]
+        return {
+            "filter": " and ".join(conditions) or None,
+            "select": ",".join(self.select) or None,
+            "expand": ",".join(self.expand) or None,
+            "orderby": self.orderby,
+            "top": self.top,
+        }
+
+
+class ODataDialect:
+    def __init__(self, creatio_url: str, odata_version: ODATA_version) -> None:
+        self.creatio_url = creatio_url
+        self.odata_version = odata_version
+        self.service_link = creatio_url + odata_version.value["service_path"]
+
+    @property
+    def is_v3(self) -> bool:
+        return self.odata_version == ODATA_version.v3
+
+    def check_supported(self) -> None:
+        if self.odata_version not in SUPPORTED_VERSIONS:
+            raise Exception(f"ODATA version is not supported: {self.odata_version}")
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.creatio_url}/ServiceModel/AuthService.svc/Login"
+
+    @property
+    def batch_url(self) -> str:
+        return self.service_link + "/$batch"
+
+    def entity_set(self, object_name: str) -> str:
+        """
+        Collection name relative to service link
+        """
+        return f"{object_name}Collection" if self.is_v3 else object_name
+
+    def collection_url(self, object_name: str, query: str = "") -> str:
+        return f"{self.service_link}/{self.entity_set(object_name)}{query}"
+
+    def object_url(
+        self,
+        object_name: str,
+        object_id: str,
+        query: Optional[ODataQuery] = None,
+    ) -> str:
+        """
+        Object URL, only $select and $expand of `query` are used
+        """
+        self.check_supported()
+        url = f"{self.collection_url(object_name)}({self.guid_literal(object_id)})"
+        if query:
+            options = query.options(self)
+            url += self.query_string(
+                {"select": options["select"], "expand": options["expand"]}
+            )
+        return url
+
+    def collection_query_url(
+        self,
+        object_name: str,
+        parameters: List[str],
+        query: Optional[ODataQuery] = None,
+    ) -> str:
+        """
+        Collection URL with legacy parameters list and `query` options
+        """
+        options = self.parameters_options(parameters)
+        if query:
+            options.update(
+                (name, value)
+                for name, value in query.options(self).items()
+                if value is not None
+            )
+        return self.collection_url(object_name, self.query_string(options))
+
+    def unwrap_object(self, data: Any) -> Any:
+        """
+        Entity from response body, v3 wraps it into `d`
+        """
+        return data["d"] if self.is_v3 else data
+
+    def unwrap_collection(self, data: Any) -> List:
+        """
+        Entities from collection response body
+        """
+        return data["d"]["results"] if self.is_v3 else data["value"]
+
+    def next_link(self, data: Any) -> Optional[str]:
+        """
+        Absolute URL of the next page of server-driven paging,
+        `d.__next` in v3 and `@odata.nextLink` in v4.
+        """
+        if self.is_v3:
+            link = data["d"].get("__next") if isinstance(data["d"], dict) else None
+        else:
+            link = data.get("@odata.nextLink")
+        if not link:
+            return None
+        return urljoin(self.service_link + "/", link)
+
+    def guid_literal(self, value: str) -> str:
+        return f"guid'{value}'" if self.is_v3 else value
+
+    def literal(self, value: Any) -> str:
+        """
+        Filter literal of value, strings are quoted and escaped
+        """
+        if value is None:
+            return "null"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (Guid, UUID)):
+            return self.guid_literal(str(UUID(str(value))))
+        if isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, datetime):
+            if self.is_v3:
+                return f"datetime'{value.replace(tzinfo=None).isoformat()}'"
+            return value.isoformat()
+        text = str(value).replace("'", "''")
+        return f"'{text}'"
+
+    @staticmethod
+    def query_string(options: Dict[str, Any]) -> str:
+        """
+        Query string of system query options, names are without `$`,
+        None values are skipped:
+
+            query_string({"filter": "Number eq '1'", "top": 10})
+            -> ?$filter=Number%20eq%20%271%27&$top=10
+        """
+        parts = [
+            f"${name}={quote(str(value), safe=',/()')}"
+            for name, value in options.items()
+            if value is not None
+        ]
+        return "?" + "&".join(parts) if parts else ""
+
+    @staticmethod
+    def parameters_options(parameters: List[str]) -> Dict[str, str]:
+        """
+        Options from legacy parameters list: ["filter=...", "top=10"]
+        """
+        options: Dict[str, str] = {}
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            options[name.lstrip("$")] = value
+        return options
+
+    def read_options(
+        self,
+        filter: Optional[str],
+        select: Optional[str],
+        orderby: Optional[str],
+        query: Optional[ODataQuery] = None,
+    ) -> Dict[str, Any]:
+        """
+        Collection read options from `query` or raw option strings
+        """
+        if query:
+            options = query.options(self)
+            options["orderby"] = options["orderby"] or orderby
+            return options
+        return {"filter": filter, "select": select, "orderby": orderby}
+
+    def page_url(
+        self,
+        object_name: str,
+        options: Dict[str, Any],
+        page_size: int,
+        skip: int,
+    ) -> str:
+        """
+        URL of collection page, used when server didn't send next link.
+        """
+        return self.collection_url(
+            object_name,
+            self.query_string({**options, "top": page_size, "skip": skip or None}),
+        )
+
+    @staticmethod
+    def login_data(login: str, password: str) -> dict:
+        return {
+            "UserName": login,
+            "UserPassword": password,
+        }
+
+
+def contact_communication_query(channel_id: str, number: str) -> ODataQuery:
+    """
+    ContactCommunication of contact with number in communication channel
+    """
+    return (
+        ODataQuery(select=["ContactId"], top=1)
+        .where("CommunicationType/Id", Guid(channel_id))
+        .where("Number", number)
+    )
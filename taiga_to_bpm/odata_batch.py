@@ -0,0 +1,190 @@
+"""
+OData $batch requests for Creatio.
+
+OData v4 uses JSON batch format, OData v3 uses multipart/mixed format
+with one changeset per request, so requests are independent and every
+one gets its own result.
+
+Example:
+
+    body, content_type = build_v3_batch(requests)
+    response = creatio.request("POST", batch_url, data=body, ...)
+    results = parse_v3_batch(response.text, response.headers["Content-Type"])
+"""
+
+# Standard Library
+import json
+import re
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from uuid import uuid4
+
+HEADERS_V3_ITEM = {
+    "Content-Type": "application/json;odata=verbose",
+    "Accept": "application/json;odata=verbose",
+}
+
+HEADERS_V4_ITEM = {
+    "Content-Type": "application/json; charset=utf-8",
+    "Accept": "application/json; charset=utf-8",
+}
+
+_boundary_re = re.compile(r'boundary="?([^";]+)"?')
+_status_re = re.compile(r"^HTTP/\d\.\d (\d{3})")
+
+
+@dataclass
+class BatchRequest:
+    method: str
+    url: str
+    body: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Result of one request of batch.
+    `data` is created entity (v3 `d` is unwrapped), `error` is error text.
+    """
+
+    index: int
+    status: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300 and self.error is None
+
+
+def _error_text(status: int, data: Any) -> str:
+    if isinstance(data, dict) and "error" in data:
+        error = data["error"]
+        message = error.get("message") if isinstance(error, dict) else error
+        if isinstance(message, dict):
+            message = message.get("value")
+        return f"HTTP {status}: {message}"
+    return f"HTTP {status}: {data}"
+
+
+def _result(index: int, status: int, data: Any) -> BatchResult:
+    if 200 <= status < 300:
+        if isinstance(data, dict) and isinstance(data.get("d"), dict):
+            data = data["d"]
+        return BatchResult(index=index, status=status, data=data or None)
+    return BatchResult(index=index, status=status, error=_error_text(status, data))
+
+
+def build_v4_batch(requests: List[BatchRequest]) -> str:
+    """
+    JSON batch body, request ids are their indexes.
+    """
+    return json.dumps(
+        {
+            "requests": [
+                {
+                    "id": str(i),
+                    "method": request.method,
+                    "url": request.url,
+                    "headers": HEADERS_V4_ITEM,
+                    **({"body": request.body} if request.body is not None else {}),
+                }
+                for i, request in enumerate(requests)
+            ]
+        }
+    )
+
+
+def parse_v4_batch(data: Dict[str, Any]) -> List[BatchResult]:
+    results = [
+        _result(int(response["id"]), int(response["status"]), response.get("body"))
+        for response in data.get("responses", [])
+    ]
+    return sorted(results, key=lambda result: result.index)
+
+
+def build_v3_batch(requests: List[BatchRequest]) -> Tuple[str, str]:
+    """
+    Multipart batch body and its Content-Type header.
+    """
+    batch = f"batch_{uuid4().hex}"
+    lines: List[str] = []
+    for request in requests:
+        changeset = f"changeset_{uuid4().hex}"
+        body = json.dumps(request.body) if request.body is not None else ""
+        lines += [
+            f"--{batch}",
+            f"Content-Type: multipart/mixed; boundary={changeset}",
+            "",
+            f"--{changeset}",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            f"{request.method} {request.url} HTTP/1.1",
+            *(f"{name}: {value}" for name, value in HEADERS_V3_ITEM.items()),
+            "",
+            body,
+            f"--{changeset}--",
+        ]
+    lines += [f"--{batch}--", ""]
+    return "\r\n".join(lines), f"multipart/mixed; boundary={batch}"
+
+
+def split_part(part: str) -> Tuple[Dict[str, str], str]:
+    head, _, body = part.partition("\r\n\r\n")
+    headers: Dict[str, str] = {}
+    for line in head.split("\r\n"):
+        name, _, value = line.partition(":")
+        if value:
+            headers[name.strip().lower()] = value.strip()
+    return headers, body
+
+
+def multipart_parts(body: str, content_type: str) -> List[str]:
+    match = _boundary_re.search(content_type)
+    if not match:
+        raise ValueError(f"No boundary in Content-Type: {content_type}")
+    delimiter = f"--{match.group(1)}"
+    body = body.replace("\r\n", "\n").replace("\n", "\r\n")
+    parts = body.split(delimiter)[1:]
+    return [
+        part.strip("\r\n") for part in parts if not part.startswith("--")
+    ]
+
+
+def _http_results(body: str, content_type: str) -> List[Tuple[int, Any]]:
+    """
+    (status, json body) of every application/http part, changesets are
+    opened recursively.
+    """
+    results: List[Tuple[int, Any]] = []
+    for part in multipart_parts(body, content_type):
+        headers, part_body = split_part(part)
+        part_type = headers.get("content-type", "")
+        if part_type.startswith("multipart/mixed"):
+            results += _http_results(part_body, part_type)
+            continue
+        match = _status_re.match(part_body)
+        if not match:
+            raise ValueError(f"Unexpected batch part: {part_body[:100]}")
+        # status line is the first line of response head
+        _, response_body = split_part(part_body)
+        try:
+            data = json.loads(response_body) if response_body.strip() else None
+        except json.JSONDecodeError:
+            data = response_body
+        results.append((int(match.group(1)), data))
+    return results
+
+
+def parse_v3_batch(body: str, content_type: str) -> List[BatchResult]:
+    return [
+        _result(i, status, data)
+        for i, (status, data) in enumerate(_http_results(body, content_type))
+    ]
@@ -0,0 +1,77 @@
+"""
+Per host rate limit of Creatio requests.
+
+Requests of all threads to the same host share one token bucket of
+CREATIO_RATE_LIMIT requests per second (0 disables the limit), bursts
+up to the same number of requests are allowed.
+"""
+
+# Standard Library
+from threading import Lock
+from time import (
+    monotonic,
+    sleep,
+)
+from typing import (
+    Callable,
+    Dict,
+    Optional,
+)
+from urllib.parse import urlsplit
+
+# My Stuff
+from core.settings import settings
+
+
+class RateLimiter:
+    """
+    Thread safe token bucket, `acquire` blocks until request is allowed.
+    Clock and sleep functions can be replaced, e.g. with fakes in tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+        sleep: Callable[[float], None] = sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # negative tokens are requests waiting for their turn
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = Lock()
+
+
+def host_limiter(url: str) -> Optional[RateLimiter]:
+    """
+    Shared limiter of url host, None when rate limit is disabled.
+    """
+    rate = settings.creatio_rate_limit
+    if rate <= 0:
+        return None
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if not limiter:
+            limiter = _limiters[host] = RateLimiter(rate)
+        return limiter
@@ -0,0 +1,580 @@
+"""
+In-process stand-in of Creatio OData service for tests and benchmarks,
+it is not a part of the taiga_to_bpm package.
+
+Serves AuthService Login, entity sets (SLReceipt, SLReceiptTask,
+ContactCommunication, Contact) and $batch for OData v3, v4 and v4core
+on a local port, so `Creatio` client and receipt pipeline work offline:
+
+    with FakeCreatio(latency=0.02) as fake:
+        fake.add("ContactCommunication", Number="+70000000000", ContactId=...)
+        creatio = Creatio(fake.url, fake.login, fake.password, ODATA_version.v4)
+        receipt = Receipt.new(desk_guid, creatio)
+        receipt.add_tasks(tasks, creatio)
+        assert fake.count("SLReceiptTask") == len(tasks)
+
+Only the subset of OData used by this project is implemented: create,
+read by Id, delete, collections with $filter (`eq`, `ne` joined with
+`and`), $select, $top, $skip and server-driven paging.
+
+Failures are injected with:
+    latency - seconds of every HTTP request
+    item_latency - seconds of every entity operation, batch items included
+    error_rate - share of requests answered with `error_status`
+    reject - callable(object_name, body) -> error message or None,
+        rejected objects are answered with 400
+    expire_sessions() - next request gets 401, client has to log in again
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import json
+import re
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from random import Random
+from threading import (
+    Lock,
+    Thread,
+)
+from time import sleep
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import (
+    parse_qs,
+    unquote,
+    urlencode,
+    urlsplit,
+)
+from uuid import uuid4
+
+# My Stuff
+from taiga_to_bpm.creatio_constants import ODATA_version
+from taiga_to_bpm.odata import SUPPORTED_VERSIONS
+from taiga_to_bpm.odata_batch import (
+    multipart_parts,
+    split_part,
+)
+
+HOST = "127.0.0.1"
+
+ENTITIES = ("SLReceipt", "SLReceiptTask", "ContactCommunication", "Contact")
+
+LOGIN_PATH = "/ServiceModel/AuthService.svc/Login"
+
+HTTP_REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+_key_re = re.compile(r"^(\w+)\((?:guid)?'?([^')]*)'?\)$")
+_condition_re = re.compile(
+    r"([\w/]+) (eq|ne) (null|guid'[^']*'|'(?:[^']|'')*'|[^\s']+)(?: and |$)"
+)
+
+Reject = Callable[[str, Dict[str, Any]], Optional[str]]
+Response = Tuple[int, Any]
+
+
+class FakeCreatio:
+    """
+    Fake Creatio on 127.0.0.1, started in a daemon thread by `start`
+    or by the context manager. Entities are kept in memory, `entities`
+    maps object name to objects by Id.
+    """
+
+    def __init__(
+        self,
+        login: str = "Supervisor",
+        password: str = "Supervisor",
+        latency: float = 0.0,
+        item_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        reject: Optional[Reject] = None,
+        max_page_size: int = 1000,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.login = login
+        self.password = password
+        self.latency = latency
+        self.item_latency = item_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reject = reject
+        self.max_page_size = max_page_size
+        self.entities: Dict[str, Dict[str, Dict[str, Any]]] = {
+            name: {} for name in ENTITIES
+        }
+        self.stats: Counter = Counter()
+        self._sessions: Dict[str, str] = {}
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Creatio host URL for `Creatio` client
+        """
+        if not self._server:
+            raise ValueError("Fake Creatio is not started")
+        return f"http://{HOST}:{self._server.server_port}"
+
+    def start(self) -> FakeCreatio:
+        self._server = ThreadingHTTPServer((HOST, 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self  # type: ignore[attr-defined]
+        self._thread = Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="fake_creatio",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread:
+            self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> FakeCreatio:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def add(self, object_name: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Put object into fake, Id is generated when it is not given
+        """
+        entity = {"Id": str(uuid4()), **fields}
+        with self._lock:
+            self.entities[object_name][str(entity["Id"])] = entity
+        return entity
+
+    def objects(self, object_name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.entities[object_name].values())
+
+    def count(self, object_name: str) -> int:
+        with self._lock:
+            return len(self.entities[object_name])
+
+    def expire_sessions(self) -> None:
+        """
+        Forget all logins, clients get 401 until they log in again
+        """
+        with self._lock:
+            self._sessions.clear()
+
+    # Request handling, called from server threads
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _login(self, body: bytes) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        self._count("login")
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            data = {}
+        if (data.get("UserName"), data.get("UserPassword")) != (
+            self.login,
+            self.password,
+        ):
+            return {"Code": 1, "Message": "Invalid username or password"}, {}
+        session, token = uuid4().hex, uuid4().hex
+        with self._lock:
+            self._sessions[session] = token
+        return {"Code": 0, "Message": ""}, {".ASPXAUTH": session, "BPMCSRF": token}
+
+    def _authorized(self, cookie_header: str, token: str) -> bool:
+        cookies = SimpleCookie()
+        cookies.load(cookie_header)
+        session = cookies.get(".ASPXAUTH")
+        with self._lock:
+            return bool(
+                session and token and self._sessions.get(session.value) == token
+            )
+
+    def _inject_error(self) -> bool:
+        with self._lock:
+            failed = bool(self.error_rate) and self._random.random() < self.error_rate
+        if failed:
+            self._count("error")
+        return failed
+
+    def _handle(
+        self,
+        version: ODATA_version,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        body: Optional[Dict[str, Any]],
+        base_url: str,
+    ) -> Response:
+        """
+        Entity request, `path` is relative to service link
+        """
+        self._count(method)
+        if self.item_latency:
+            sleep(self.item_latency)
+        is_v3 = version == ODATA_version.v3
+        match = _key_re.match(path)
+        name, key = match.groups() if match else (path, None)
+        if is_v3:
+            if not name.endswith("Collection"):
+                return _error(is_v3, 404, f"Unknown entity set {name}")
+            name = name[: -len("Collection")]
+        if name not in self.entities:
+            return _error(is_v3, 404, f"Unknown entity set {name}")
+
+        if method == "POST" and key is None:
+            if not isinstance(body, dict):
+                return _error(is_v3, 400, "Object body is expected")
+            message = self.reject(name, body) if self.reject else None
+            if message:
+                return _error(is_v3, 400, message)
+            entity = self.add(name, **body)
+            return 201, {"d": entity} if is_v3 else entity
+        if method == "GET" and key is None:
+            return self._collection(is_v3, name, query, base_url)
+        if key is None:
+            return _error(is_v3, 400, f"{method} is not supported for collection")
+
+        with self._lock:
+            found = self.entities[name].get(key)
+            if found and method == "DELETE":
+                del self.entities[name][key]
+        if not found:
+            return _error(is_v3, 404, f"{name} {key} not found")
+        if method == "DELETE":
+            return 204, None
+        if method == "GET":
+            entity = _select(found, query)
+            return 200, {"d": entity} if is_v3 else entity
+        return _error(is_v3, 400, f"{method} is not supported")
+
+    def _collection(
+        self,
+        is_v3: bool,
+        name: str,
+        query: Dict[str, List[str]],
+        base_url: str,
+    ) -> Response:
+        def option(key: str) -> Optional[str]:
+            return query.get(f"${key}", [None])[0]
+
+        try:
+            conditions = _parse_filter(option("filter"))
+            top_option = option("top")
+            top = int(top_option) if top_option else None
+            skip = int(option("skip") or 0)
+        except ValueError as e:
+            return _error(is_v3, 400, str(e))
+        items = [
+            entity for entity in self.objects(name) if _matches(entity, conditions)
+        ]
+        orderby = option("orderby")
+        if orderby:
+            field, _, direction = orderby.partition(" ")
+            items.sort(
+                key=lambda entity: str(entity.get(field)),
+                reverse=direction == "desc",
+            )
+        limit = top if top is not None else len(items)
+        size = min(limit, self.max_page_size)
+        page = [_select(entity, query) for entity in items[skip : skip + size]]
+        next_link = None
+        # server-driven paging, rest of requested items is on next pages
+        if size < limit and skip + size < len(items):
+            next_query = {
+                key: values[0] for key, values in query.items() if key != "$skip"
+            }
+            next_query["$skip"] = str(skip + size)
+            if top is not None:
+                next_query["$top"] = str(top - size)
+            next_link = f"{base_url}?{urlencode(next_query)}"
+        if is_v3:
+            data: Dict[str, Any] = {"results": page}
+            if next_link:
+                data["__next"] = next_link
+            return 200, {"d": data}
+        data = {"value": page}
+        if next_link:
+            data["@odata.nextLink"] = next_link
+        return 200, data
+
+    def _batch_v4(self, version: ODATA_version, body: bytes, service: str) -> Response:
+        self._count("batch")
+        responses = []
+        for request in json.loads(body).get("requests", []):
+            path, _, query = request["url"].partition("?")
+            status, data = self._handle(
+                version,
+                request["method"],
+                path.lstrip("/"),
+                parse_qs(query),
+                request.get("body"),
+                f"{service}/{path.lstrip('/')}",
+            )
+            responses.append(
+                {
+                    "id": request["id"],
+                    "status": status,
+                    **({"body": data} if data is not None else {}),
+                }
+            )
+        return 200, {"responses": responses}
+
+    def _batch_v3(
+        self,
+        version: ODATA_version,
+        body: str,
+        content_type: str,
+        service: str,
+    ) -> Tuple[int, str, str]:
+        """
+        Status, multipart body and its Content-Type, a changeset
+        response for every request.
+        """
+        self._count("batch")
+        batch = f"batchresponse_{uuid4().hex}"
+        lines: List[str] = []
+        for status, data in self._batch_v3_parts(version, body, content_type, service):
+            changeset = f"changesetresponse_{uuid4().hex}"
+            lines += [
+                f"--{batch}",
+                f"Content-Type: multipart/mixed; boundary={changeset}",
+                "",
+                f"--{changeset}",
+                "Content-Type: application/http",
+                "Content-Transfer-Encoding: binary",
+                "",
+                f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                "Content-Type: application/json;odata=verbose",
+                "",
+                json.dumps(data) if data is not None else "",
+                f"--{changeset}--",
+            ]
+        lines += [f"--{batch}--", ""]
+        return 202, "\r\n".join(lines), f"multipart/mixed; boundary={batch}"
+
+    def _batch_v3_parts(
+        self,
+        version: ODATA_version,
+        body: str,
+        content_type: str,
+        service: str,
+    ) -> List[Response]:
+        results: List[Response] = []
+        for part in multipart_parts(body, content_type):
+            headers, part_body = split_part(part)
+            part_type = headers.get("content-type", "")
+            if part_type.startswith("multipart/mixed"):
+                results += self._batch_v3_parts(version, part_body, part_type, service)
+                continue
+            request_line, _, _ = part_body.partition("\r\n")
+            method, url = request_line.split(" ")[:2]
+            # request line is the first line of request head
+            _, request_body = split_part(part_body)
+            path, _, query = url.partition("?")
+            results.append(
+                self._handle(
+                    version,
+                    method,
+                    path.lstrip("/"),
+                    parse_qs(query),
+                    json.loads(request_body) if request_body.strip() else None,
+                    f"{service}/{path.lstrip('/')}",
+                )
+            )
+        return results
+
+
+def _error(is_v3: bool, status: int, message: str) -> Response:
+    if is_v3:
+        message_v3 = {"lang": "en-US", "value": message}
+        return status, {"error": {"code": "", "message": message_v3}}
+    return status, {"error": {"code": "", "message": message}}
+
+
+def _parse_filter(text: Optional[str]) -> List[Tuple[str, str, Any]]:
+    """
+    Conditions of $filter: [(field, operator, value)], lookups like
+    `Contact/Id` are compared with `ContactId` field.
+    """
+    if not text:
+        return []
+    conditions = _condition_re.findall(text)
+    if " and ".join(" ".join(condition) for condition in conditions) != text:
+        raise ValueError(f"Unsupported $filter: {text}")
+    result = []
+    for name, operator, literal in conditions:
+        if literal == "null":
+            value = None
+        elif literal.startswith("guid'"):
+            value = literal[5:-1]
+        elif literal.startswith("'"):
+            value = literal[1:-1].replace("''", "'")
+        else:
+            value = literal
+        if name.endswith("/Id"):
+            name = name[: -len("/Id")] + "Id"
+        result.append((name, operator, value))
+    return result
+
+
+def _matches(entity: Dict[str, Any], conditions: List[Tuple[str, str, Any]]) -> bool:
+    for name, operator, value in conditions:
+        actual = entity.get(name)
+        if actual is not None and value is not None:
+            equal = str(actual).lower() == str(value).lower()
+        else:
+            equal = actual is value
+        if equal != (operator == "eq"):
+            return False
+    return True
+
+
+def _select(entity: Dict[str, Any], query: Dict[str, List[str]]) -> Dict[str, Any]:
+    select = query.get("$select")
+    if not select:
+        return dict(entity)
+    fields = select[0].split(",")
+    return {name: value for name, value in entity.items() if name in fields}
+
+
+def _service(path: str) -> Optional[Tuple[ODATA_version, str]]:
+    """
+    OData version and service path of request path
+    """
+    for version in SUPPORTED_VERSIONS:
+        service_path = version.value["service_path"]
+        if path == service_path or path.startswith(service_path + "/"):
+            return version, service_path
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are sent in one write, flushed after every request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: Any
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._dispatch()
+
+    def do_POST(self) -> None:
+        self._dispatch()
+
+    def do_DELETE(self) -> None:
+        self._dispatch()
+
+    def _send(
+        self,
+        status: int,
+        body: Any = None,
+        content_type: str = "application/json",
+        cookies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if body is None:
+            content = b""
+        elif isinstance(body, str):
+            content = body.encode()
+        else:
+            content = json.dumps(body).encode()
+        self.send_response(status, HTTP_REASONS.get(status))
+        for name, value in (cookies or {}).items():
+            self.send_header("Set-Cookie", f"{name}={value}; Path=/")
+        if content:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _dispatch(self) -> None:
+        fake: FakeCreatio = self.server.fake
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        url_path = unquote(url.path)
+        fake._count("request")
+        if fake.latency:
+            sleep(fake.latency)
+
+        if url_path == LOGIN_PATH and self.command == "POST":
+            data, cookies = fake._login(body)
+            self._send(200, data, cookies=cookies)
+            return
+        service = _service(url_path)
+        if not service:
+            self._send(404, {"error": {"code": "", "message": "Not found"}})
+            return
+        version, service_path = service
+        is_v3 = version == ODATA_version.v3
+        if not fake._authorized(
+            self.headers.get("Cookie", ""), self.headers.get("BPMCSRF", "")
+        ):
+            self._send(*_error(is_v3, 401, "Session is expired"))
+            return
+        if fake._inject_error():
+            self._send(*_error(is_v3, fake.error_status, "Injected error"))
+            return
+
+        service_url = f"http://{self.headers.get('Host')}{service_path}"
+        path = url_path[len(service_path) :].lstrip("/")
+        try:
+            if path == "$batch" and self.command == "POST":
+                if is_v3:
+                    status, text, content_type = fake._batch_v3(
+                        version,
+                        body.decode(),
+                        self.headers.get("Content-Type", ""),
+                        service_url,
+                    )
+                    self._send(status, text, content_type)
+                else:
+                    self._send(*fake._batch_v4(version, body, service_url))
+                return
+            status, data = fake._handle(
+                version,
+                self.command,
+                path,
+                parse_qs(url.query),
+                json.loads(body) if body else None,
+                f"{service_url}/{path}",
+            )
+        except ValueError as e:
+            # json.JSONDecodeError is ValueError too
+            status, data = _error(is_v3, 400, str(e))
+        self._send(status, data)
@@ -0,0 +1,117 @@
+# Standard Library
+import asyncio
+from uuid import uuid4
+
+# Third Party Stuff
+import pytest
+
+# My Stuff
+from taiga_to_bpm.creatio_constants import ODATA_version
+from tests.fake_creatio import FakeCreatio
+
+pytest.importorskip("httpx")
+
+# My Stuff
+from taiga_to_bpm.async_creatio import AsyncCreatio  # noqa: E402
+
+VERSIONS = [ODATA_version.v3, ODATA_version.v4, ODATA_version.v4core]
+
+
+@pytest.fixture
+def fake():
+    with FakeCreatio(max_page_size=3) as fake:
+        yield fake
+
+
+async def connect(fake: FakeCreatio, version: ODATA_version) -> AsyncCreatio:
+    return await AsyncCreatio.connect(fake.url, fake.login, fake.password, version)
+
+
+def test_wrong_password(fake):
+    async def login():
+        async with AsyncCreatio(
+            fake.url, fake.login, "wrong", ODATA_version.v4
+        ) as creatio:
+            await creatio.authenticate()
+
+    with pytest.raises(Exception, match="Invalid username or password"):
+        asyncio.run(login())
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_create_get_delete(fake, version):
+    async def run():
+        async with await connect(fake, version) as creatio:
+            receipt = await creatio.post_receipt("desk")
+            loaded = await creatio.get_object_by_id("SLReceipt", receipt["Id"])
+            response = await creatio.delete_object("SLReceipt", receipt["Id"])
+            return receipt, loaded, response.status_code
+
+    receipt, loaded, status = asyncio.run(run())
+    assert loaded == receipt
+    assert status == 204
+    assert fake.count("SLReceipt") == 0
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_login_again_when_session_expired(fake, version):
+    async def run():
+        async with await connect(fake, version) as creatio:
+            fake.expire_sessions()
+            return await creatio.post_receipt("desk")
+
+    assert asyncio.run(run())["Id"]
+    assert fake.stats["login"] == 2
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_batch_results_in_order(fake, version):
+    fake.reject = lambda name, body: "No receipt" if not body["SLReceiptId"] else None
+    rows = [{"SLName": str(n), "SLReceiptId": n % 3} for n in range(7)]
+
+    async def run():
+        async with await connect(fake, version) as creatio:
+            return await creatio.create_objects("SLReceiptTask", rows, chunk_size=4)
+
+    results = asyncio.run(run())
+    assert [result.index for result in results] == list(range(7))
+    assert [result.ok for result in results] == [n % 3 != 0 for n in range(7)]
+    assert "No receipt" in results[0].error
+    assert results[1].data["SLName"] == "1"
+    assert fake.stats["batch"] == 2
+    assert fake.count("SLReceiptTask") == 4
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_collection_paging_and_filter(fake, version):
+    channel_id = str(uuid4())
+    contact_ids = [
+        fake.add(
+            "ContactCommunication",
+            Number=f"+7{n}",
+            ContactId=str(uuid4()),
+            CommunicationTypeId=channel_id,
+        )["ContactId"]
+        for n in range(8)
+    ]
+    fake.add("ContactCommunication", Number="it's", ContactId="quoted")
+
+    async def run():
+        async with await connect(fake, version) as creatio:
+            items = [
+                item
+                async for item in creatio.iter_object_collection(
+                    "ContactCommunication", select="ContactId", page_size=5
+                )
+            ]
+            pages = fake.stats["GET"]
+            found = await creatio.get_creatio_contact_id(channel_id, "+75")
+            missing = await creatio.get_creatio_contact_id(channel_id, "+79")
+            return items, pages, found, missing
+
+    items, pages, found, missing = asyncio.run(run())
+    # server pages of 3 items are followed by next links
+    assert len(items) == 9
+    assert pages == 4
+    assert found == contact_ids[5]
+    assert missing is None
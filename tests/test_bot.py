@@ -8,6 +8,8 @@ from bot_interface.handlers import (
     edit_report_query_next_step,
 )
 from core.models import TUser
+from core.write_behind import get_user_write_buffer
+from db.db_worker import get_one
 
 NEW_CHAT_ID = 5465927463
 EXISTING_CHAT_ID = 65310
@@ -29,6 +31,17 @@ def test_start_for_not_known_user():
         assert msg.text == txt
 
 
+def test_start_saves_user_on_flush():
+    with TUser(chat_id=NEW_CHAT_ID) as user:
+        command_start(user.tg_message)
+        get_user_write_buffer().flush()
+        row = get_one(
+            "SELECT telegram_id FROM bot_users WHERE telegram_id = %(chat_id)s",
+            {"chat_id": NEW_CHAT_ID},
+        )
+        assert row
+
+
 def test_2_report():
     with TUser(chat_id=EXISTING_CHAT_ID, delete_on_exit=False) as test_user:
         test_user.user.bot_state = State.REPORTS_O.name
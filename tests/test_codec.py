@@ -0,0 +1,22 @@
+# Third Party Stuff
+import pytest
+
+# My Stuff
+from core import codec
+from core.models import User
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_codec_round_trip(name):
+    if name == "orjson" and not codec.orjson:
+        pytest.skip("orjson is not installed")
+    c = codec.make_codec(name)
+    data = {"event_type": "timeline.created", "data": "{\"id\": 1}", "text": "Акт"}
+    assert c.loads(c.dumps(data)) == data
+    with pytest.raises(codec.DecodeError):
+        c.loads("{broken")
+
+
+def test_model_round_trip():
+    user = User(chat_id=65310, bot_state="REPORTS_O", report_id=2)
+    assert codec.load_model(User, codec.dump_model(user)) == user
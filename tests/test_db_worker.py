@@ -1,8 +1,20 @@
+# Standard Library
+import asyncio
+
 # Third Party Stuff
 from dotenv import load_dotenv
 
 # My Stuff
-from db import db_worker
+from core.settings import settings
+from db import (
+    async_db_worker,
+    db_worker,
+)
+from db.pool import (
+    close_async_pools,
+    close_pools,
+    get_pool,
+)
 
 load_dotenv()
 
@@ -16,3 +28,57 @@ def test_get_one():
     )
     assert user
     assert user[0] == 1
+
+
+def test_pool_is_shared(monkeypatch):
+    # fresh pools of one connection, both queries must reuse it
+    close_pools()
+    monkeypatch.setattr(settings, "db_pool_min_size", 1)
+    monkeypatch.setattr(settings, "db_pool_max_size", 1)
+    query = "SELECT pg_backend_pid()"
+    first = db_worker.get_one(query)
+    second = db_worker.get_one(query)
+    stats = get_pool(settings.taiga_db_url).get_stats()
+    close_pools()
+    assert first and second and first[0] == second[0]
+    assert stats["connections_num"] == 1
+    assert stats["requests_num"] >= 2
+
+
+def test_iter_rows():
+    query = "SELECT generate_series(1, %(count)s)"
+    args = {"count": 25}
+    rows = db_worker.iter_rows(query, args, batch_size=10)
+    assert [row[0] for row in rows] == list(range(1, 26))
+
+
+def test_execute_many_returning():
+    query = "SELECT %(value)s::int * 2"
+    args_list = [{"value": value} for value in range(5)]
+    rows = db_worker.execute_many(query, args_list, returning=True)
+    assert [row[0] for row in rows] == [0, 2, 4, 6, 8]
+
+
+def test_query_result_columns():
+    query = "SELECT id, telegram_id FROM bot_users WHERE telegram_id = %(telegram_id)s"
+    args = {"telegram_id": 65310}
+    result = db_worker.query_result(query, args)
+    assert result.columns == ["id", "telegram_id"]
+    assert result.rows[0][0] == 1
+
+
+def test_async_get_one_concurrently():
+    query = "SELECT id, telegram_id FROM bot_users WHERE telegram_id = %(telegram_id)s"
+    args = {"telegram_id": 65310}
+
+    async def get_users():
+        try:
+            return await asyncio.gather(
+                async_db_worker.get_one(query, args),
+                async_db_worker.get_one(query, args),
+            )
+        finally:
+            await close_async_pools()
+
+    users = asyncio.run(get_users())
+    assert all(user and user[0] == 1 for user in users)
@@ -0,0 +1,203 @@
+# Standard Library
+from uuid import uuid4
+
+# Third Party Stuff
+import pytest
+
+# My Stuff
+from core.settings import settings
+from taiga_to_bpm.creatio import Creatio
+from taiga_to_bpm.creatio_constants import ODATA_version
+from taiga_to_bpm.creatio_worker import (
+    Receipt,
+    Task,
+)
+from tests.fake_creatio import FakeCreatio
+
+VERSIONS = [ODATA_version.v3, ODATA_version.v4, ODATA_version.v4core]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setattr(settings, "creatio_rate_limit", 0)
+    with FakeCreatio(max_page_size=3) as fake:
+        yield fake
+
+
+def connect(fake: FakeCreatio, version: ODATA_version) -> Creatio:
+    return Creatio(fake.url, fake.login, fake.password, version)
+
+
+def make_task(n: int, bpm_user_guid: str = "") -> Task:
+    return Task(
+        id=n,
+        subject=f"Task {n}",
+        bpm_user_guid=bpm_user_guid or str(uuid4()),
+        desk_guid=str(uuid4()),
+        estimate=1,
+        hours=1,
+        minutes=30,
+        ref=str(n),
+        assigned_to_id=1,
+        url=f"https://taiga.example.com/task/{n}",
+        user_full_name="Tester",
+    )
+
+
+def test_wrong_password(fake):
+    with pytest.raises(Exception, match="Invalid username or password"):
+        Creatio(fake.url, fake.login, "wrong", ODATA_version.v4)
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_create_get_delete(fake, version):
+    creatio = connect(fake, version)
+    receipt = creatio.post_receipt("desk")
+    assert fake.objects("SLReceipt") == [receipt]
+    assert creatio.get_object_by_id("SLReceipt", receipt["Id"]) == receipt
+    assert creatio.delete_object("SLReceipt", receipt["Id"]).status_code == 204
+    assert fake.count("SLReceipt") == 0
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_batch_results_in_order(fake, version):
+    fake.reject = lambda name, body: "No receipt" if not body["SLReceiptId"] else None
+    creatio = connect(fake, version)
+    rows = [{"SLName": str(n), "SLReceiptId": n % 3} for n in range(7)]
+    results = creatio.create_objects("SLReceiptTask", rows, chunk_size=4)
+    assert [result.index for result in results] == list(range(7))
+    assert [result.ok for result in results] == [n % 3 != 0 for n in range(7)]
+    assert "No receipt" in results[0].error
+    assert results[1].data["SLName"] == "1"
+    assert fake.stats["batch"] == 2
+    assert fake.count("SLReceiptTask") == 4
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_collection_paging_and_filter(fake, version):
+    channel_id = str(uuid4())
+    contact_ids = [
+        fake.add(
+            "ContactCommunication",
+            Number=f"+7{n}",
+            ContactId=str(uuid4()),
+            CommunicationTypeId=channel_id,
+        )["ContactId"]
+        for n in range(8)
+    ]
+    fake.add("ContactCommunication", Number="it's", ContactId="quoted")
+    creatio = connect(fake, version)
+    items = list(
+        creatio.iter_object_collection(
+            "ContactCommunication", select="ContactId", page_size=5
+        )
+    )
+    # server pages of 3 items are followed by next links
+    assert len(items) == 9
+    assert fake.stats["GET"] == 4
+    assert creatio.get_creatio_contact_id(channel_id, "+75") == contact_ids[5]
+    assert creatio.get_creatio_contact_id(channel_id, "+79") is None
+
+
+def test_login_again_when_session_expired(fake):
+    creatio = connect(fake, ODATA_version.v4)
+    fake.expire_sessions()
+    assert creatio.post_receipt("desk")["Id"]
+    assert fake.stats["login"] == 2
+
+
+def test_injected_errors(fake):
+    fake.error_rate = 1
+    creatio = connect(fake, ODATA_version.v4)
+    results = creatio.create_objects("SLReceiptTask", [{"SLName": "1"}])
+    assert results[0].status == 503
+    assert fake.count("SLReceiptTask") == 0
+
+
+@pytest.mark.parametrize("mode", ["batch", "concurrent"])
+def test_receipt_add_tasks(fake, mode):
+    creatio = connect(fake, ODATA_version.v3)
+    receipt = Receipt.new(str(uuid4()), creatio)
+    tasks = [make_task(n) for n in range(5)]
+    tasks[2].bpm_user_guid = ""
+    results = receipt.add_tasks(tasks, creatio, mode)
+    assert {result.task.id: result.ok for result in results} == {
+        0: True,
+        1: True,
+        2: False,
+        3: True,
+        4: True,
+    }
+    assert {task["SLReceiptId"] for task in fake.objects("SLReceiptTask")} == {
+        receipt.guid
+    }
+    assert fake.count("SLReceiptTask") == 4
+
+
+@pytest.mark.parametrize("mode", ["batch", "concurrent"])
+def test_checkpoint_error_does_not_hide_results(fake, monkeypatch, mode):
+    def checkpoint(tasks):
+        if any(task.id == 1 for task in tasks):
+            raise ValueError("Database is down")
+
+    creatio = connect(fake, ODATA_version.v4)
+    receipt = Receipt.new(str(uuid4()), creatio)
+    monkeypatch.setattr(receipt, "_checkpoint", checkpoint)
+    monkeypatch.setattr(settings, "creatio_batch_size", 2)
+    results = receipt.add_tasks([make_task(n) for n in range(4)], creatio, mode)
+    assert {result.task.id: result.ok for result in results} == {
+        0: mode == "concurrent",
+        1: False,
+        2: True,
+        3: True,
+    }
+    assert "checkpoint failed: Database is down" in results[1].error
+    assert all(result.task.guid for result in results)
+
+
+def test_receipt_with_given_guid_exists_until_deleted(fake):
+    creatio = connect(fake, ODATA_version.v4)
+    guid = str(uuid4())
+    receipt = Receipt.new(str(uuid4()), creatio, guid)
+    assert receipt.guid == guid
+    assert receipt.exists(creatio)
+    creatio.delete_object("SLReceipt", guid)
+    assert not receipt.exists(creatio)
+
+
+@pytest.mark.parametrize("mode", ["batch", "concurrent"])
+def test_interrupted_push_is_resumed(fake, monkeypatch, mode):
+    checkpoints = {}
+    creatio = connect(fake, ODATA_version.v4)
+    receipt = Receipt.new(str(uuid4()), creatio)
+    receipt.project_id = 1
+    monkeypatch.setattr(receipt, "pushed_tasks", lambda: dict(checkpoints))
+    monkeypatch.setattr(
+        receipt,
+        "_checkpoint",
+        lambda tasks: checkpoints.update({task.id: task.guid for task in tasks}),
+    )
+    # Creatio fails on the last tasks, so the push stops halfway
+    fake.reject = lambda name, body: "Timeout" if body["SLName"] >= "Task 3" else None
+    tasks = [make_task(n) for n in range(5)]
+    results = receipt.add_tasks(tasks, creatio, mode)
+    assert {result.task.id: result.ok for result in results} == {
+        0: True,
+        1: True,
+        2: True,
+        3: False,
+        4: False,
+    }
+    first_guids = dict(checkpoints)
+
+    fake.reject = None
+    posts = fake.stats["POST"]
+    retry = [make_task(n) for n in range(5)]
+    results = receipt.add_tasks(retry, creatio, mode)
+    assert all(result.ok for result in results)
+    assert fake.count("SLReceiptTask") == 5
+    assert set(checkpoints) == set(range(5))
+    assert {task.id: task.guid for task in retry[:3]} == first_guids
+    # only two missing tasks are sent again
+    if mode == "concurrent":
+        assert fake.stats["POST"] - posts == 2
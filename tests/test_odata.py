@@ -0,0 +1,58 @@
+# My Stuff
+from taiga_to_bpm.creatio_constants import ODATA_version
+from taiga_to_bpm.odata import (
+    Guid,
+    ODataDialect,
+    ODataQuery,
+)
+
+CREATIO_URL = "https://creatio.example.com"
+
+
+def test_query_string_joins_several_options():
+    query = ODataDialect.query_string(
+        {"filter": "Number eq '1'", "select": "Id,ContactId", "top": 10, "skip": None}
+    )
+    assert query == "?$filter=Number%20eq%20%271%27&$select=Id,ContactId&$top=10"
+
+
+def test_legacy_parameters():
+    options = ODataDialect.parameters_options(["filter=Number eq '1'", "$top=5"])
+    assert options == {"filter": "Number eq '1'", "top": "5"}
+
+
+def test_next_link():
+    v4 = ODataDialect(CREATIO_URL, ODATA_version.v4)
+    assert v4.next_link({"value": []}) is None
+    assert (
+        v4.next_link({"value": [], "@odata.nextLink": "Contact?$skiptoken=5"})
+        == f"{CREATIO_URL}/0/odata/Contact?$skiptoken=5"
+    )
+    v3 = ODataDialect(CREATIO_URL, ODATA_version.v3)
+    link = f"{v3.service_link}/ContactCollection?$skiptoken=5"
+    assert v3.next_link({"d": {"results": [], "__next": link}}) == link
+
+
+def test_query_filter_is_escaped_for_dialect():
+    channel_id = "3DDDB3CC-53EE-49C4-A71F-E9E257F59E49"
+    query = (
+        ODataQuery(select=["ContactId"], top=1)
+        .where("CommunicationType/Id", Guid(channel_id))
+        .where("Number", "O'Brien")
+    )
+    v3 = query.options(ODataDialect(CREATIO_URL, ODATA_version.v3))
+    v4 = query.options(ODataDialect(CREATIO_URL, ODATA_version.v4))
+    assert v3["filter"] == (
+        f"CommunicationType/Id eq guid'{channel_id.lower()}' and Number eq 'O''Brien'"
+    )
+    assert v4["filter"] == (
+        f"CommunicationType/Id eq {channel_id.lower()} and Number eq 'O''Brien'"
+    )
+    assert v4["select"] == "ContactId" and v4["top"] == 1
+
+
+def test_object_url_with_select():
+    v4 = ODataDialect(CREATIO_URL, ODATA_version.v4core)
+    query = ODataQuery(select=["Name"], expand=["Owner"])
+    url = v4.object_url("Contact", "guid", query)
+    assert url == f"{CREATIO_URL}/odata/Contact(guid)?$select=Name&$expand=Owner"
@@ -0,0 +1,69 @@
+# My Stuff
+from taiga_to_bpm.odata_batch import (
+    BatchRequest,
+    build_v3_batch,
+    parse_v3_batch,
+    parse_v4_batch,
+)
+
+V3_RESPONSE = (
+    "--batchresponse_1\r\n"
+    "Content-Type: multipart/mixed; boundary=changesetresponse_1\r\n"
+    "\r\n"
+    "--changesetresponse_1\r\n"
+    "Content-Type: application/http\r\n"
+    "Content-Transfer-Encoding: binary\r\n"
+    "\r\n"
+    "HTTP/1.1 201 Created\r\n"
+    "Content-Type: application/json;odata=verbose\r\n"
+    "\r\n"
+    '{"d": {"Id": "3f2b4a1e-0000-0000-0000-000000000001"}}\r\n'
+    "--changesetresponse_1--\r\n"
+    "--batchresponse_1\r\n"
+    "Content-Type: multipart/mixed; boundary=changesetresponse_2\r\n"
+    "\r\n"
+    "--changesetresponse_2\r\n"
+    "Content-Type: application/http\r\n"
+    "Content-Transfer-Encoding: binary\r\n"
+    "\r\n"
+    "HTTP/1.1 400 Bad Request\r\n"
+    "Content-Type: application/json\r\n"
+    "\r\n"
+    '{"error": {"message": {"lang": "en-US", "value": "Invalid SLExecutorId"}}}\r\n'
+    "--changesetresponse_2--\r\n"
+    "--batchresponse_1--\r\n"
+)
+
+
+def test_v3_batch_has_changeset_per_request():
+    body, content_type = build_v3_batch(
+        [
+            BatchRequest("POST", "SLReceiptTaskCollection", {"SLName": "first"}),
+            BatchRequest("POST", "SLReceiptTaskCollection", {"SLName": "second"}),
+        ]
+    )
+    assert content_type.startswith("multipart/mixed; boundary=batch_")
+    assert body.count("POST SLReceiptTaskCollection HTTP/1.1") == 2
+    assert body.count("boundary=changeset_") == 2
+
+
+def test_parse_v3_batch():
+    results = parse_v3_batch(V3_RESPONSE, "multipart/mixed; boundary=batchresponse_1")
+    assert results[0].ok
+    assert results[0].data == {"Id": "3f2b4a1e-0000-0000-0000-000000000001"}
+    assert not results[1].ok
+    assert results[1].error == "HTTP 400: Invalid SLExecutorId"
+
+
+def test_parse_v4_batch_keeps_request_order():
+    results = parse_v4_batch(
+        {
+            "responses": [
+                {"id": "1", "status": 400, "body": {"error": {"message": "Bad"}}},
+                {"id": "0", "status": 201, "body": {"Id": "guid"}},
+            ]
+        }
+    )
+    assert [result.index for result in results] == [0, 1]
+    assert results[0].ok and results[0].data == {"Id": "guid"}
+    assert results[1].error == "HTTP 400: Bad"
@@ -0,0 +1,21 @@
+# Standard Library
+import asyncio
+
+# My Stuff
+from db import pool
+
+
+def test_async_pools_belong_to_their_event_loop():
+    async def loop_pools():
+        pools, lock = pool._loop_async_pools()
+        pools.setdefault("dsn", object())
+        again, same_lock = pool._loop_async_pools()
+        assert again is pools and same_lock is lock
+        return pools["dsn"], lock
+
+    first_pool, first_lock = asyncio.run(loop_pools())
+    second_pool, second_lock = asyncio.run(loop_pools())
+    assert second_pool is not first_pool
+    assert second_lock is not first_lock
+    # pools of the closed loops are dropped
+    assert len(pool._async_pools) == 1
@@ -0,0 +1,45 @@
+# My Stuff
+from db.query_stats import (
+    BUCKETS_MS,
+    QueryStat,
+    args_shape,
+    fingerprint,
+)
+
+
+def test_fingerprint_normalizes_literals_and_whitespace():
+    query = """
+        SELECT * FROM t  -- comment
+        WHERE id = 5 AND name = 'it''s' /* block */ AND price > 1.5
+    """
+    assert fingerprint(query) == (
+        "SELECT * FROM t WHERE id = ? AND name = ? AND price > ?"
+    )
+
+
+def test_fingerprint_keeps_placeholders_and_identifiers():
+    query = "SELECT col1 FROM t2 WHERE telegram_id = %(telegram_id)s"
+    assert fingerprint(query) == query
+
+
+def test_args_shape_hides_values():
+    assert args_shape(None) is None
+    assert args_shape({"chat_id": 65310, "name": "x"}) == {
+        "chat_id": "int",
+        "name": "str",
+    }
+    assert args_shape((1, "x", None)) == ["int", "str", "NoneType"]
+    assert args_shape([{"id": 1}, {"id": 2}]) == "2 x {'id': 'int'}"
+    assert args_shape(7) == "int"
+
+
+def test_percentile_is_bucket_upper_bound():
+    stat = QueryStat(fingerprint="q")
+    for elapsed_ms in [0.5] * 90 + [30] * 9 + [20000]:
+        stat.add(elapsed_ms)
+    assert stat.count == 100
+    assert stat.percentile(50) == BUCKETS_MS[0]
+    assert stat.percentile(95) == 50
+    # last bucket is unbounded, its percentile is the maximum
+    assert stat.percentile(100) == 20000
+    assert QueryStat(fingerprint="empty").percentile(95) == 0.0
@@ -0,0 +1,41 @@
+# Standard Library
+from concurrent.futures import ThreadPoolExecutor
+
+# My Stuff
+from taiga_to_bpm.rate_limit import RateLimiter
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+def test_rate_limiter_shared_by_threads():
+    time = FakeTime()
+    limiter = RateLimiter(rate=50, clock=time.clock, sleep=time.sleep)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: limiter.acquire(), range(100)))
+    # first 50 requests are the burst, the rest wait for their tokens in turn
+    assert sorted(time.sleeps) == [n / 50 for n in range(1, 51)]
+
+
+def test_rate_limiter_refills_tokens():
+    time = FakeTime()
+    limiter = RateLimiter(rate=10, burst=2, clock=time.clock, sleep=time.sleep)
+    for _ in range(3):
+        limiter.acquire()
+    assert time.sleeps == [0.1]
+    time.now += 0.3
+    # 0.3s refill 3 tokens, one of them is owed by the waiting request
+    limiter.acquire()
+    limiter.acquire()
+    assert time.sleeps == [0.1]
+    limiter.acquire()
+    assert time.sleeps == [0.1, 0.1]
@@ -0,0 +1,122 @@
+# Standard Library
+from contextlib import contextmanager
+
+# Third Party Stuff
+import pytest
+from psycopg import OperationalError
+from psycopg.errors import QueryCanceled
+
+# My Stuff
+from db import (
+    db_worker,
+    replica,
+)
+from db.replica import ReplicaRouter
+
+PRIMARY = "host=primary dbname=taiga"
+REPLICA = "host=replica dbname=taiga"
+
+
+class FakeConnection:
+    def __init__(self, url: str, lag: float = 0.0) -> None:
+        self.url = url
+        self.lag = lag
+
+    def execute(self, query, args=None):
+        return self
+
+    def fetchone(self):
+        return (self.lag,)
+
+
+class FakePool:
+    def __init__(self, url: str, lag: float = 0.0) -> None:
+        self.url = url
+        self.lag = lag
+
+    @contextmanager
+    def connection(self, timeout=None):
+        yield FakeConnection(self.url, self.lag)
+
+
+def make_router(check_interval: float = 10.0) -> ReplicaRouter:
+    return ReplicaRouter(
+        PRIMARY, REPLICA, max_lag_seconds=30, check_interval=check_interval
+    )
+
+
+@pytest.mark.parametrize("lag, url", [(0, REPLICA), (29, REPLICA), (31, PRIMARY)])
+def test_replica_lag_threshold(monkeypatch, lag, url):
+    monkeypatch.setattr(replica, "get_pool", lambda db_url: FakePool(db_url, lag))
+    assert make_router().read_url() == url
+
+
+def test_replica_is_checked_once_per_interval(monkeypatch):
+    router = make_router()
+    checks = []
+    monkeypatch.setattr(router, "_check", lambda: checks.append(1) or True)
+    assert router.read_url() == REPLICA
+    assert router.read_url() == REPLICA
+    assert len(checks) == 1
+
+
+def test_replica_is_not_used_until_next_check_after_failure(monkeypatch):
+    router = make_router(check_interval=0)
+    monkeypatch.setattr(router, "_check", lambda: True)
+    assert router.read_url() == REPLICA
+    router.check_interval = 10
+    router.mark_unavailable(OperationalError("connection lost"))
+    assert router.read_url() == PRIMARY
+
+
+def test_last_known_url_is_used_during_check(monkeypatch):
+    router = make_router(check_interval=0)
+    monkeypatch.setattr(router, "_check", lambda: True)
+    router.read_url()
+
+    def check():
+        # another thread asks for url while the check is running
+        router.check_interval = 10
+        assert router.read_url() == REPLICA
+        return False
+
+    monkeypatch.setattr(router, "_check", check)
+    router.check_interval = 0
+    assert router.read_url() == PRIMARY
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """db_worker reads with healthy replica router and fake pools"""
+    router = make_router()
+    monkeypatch.setattr(router, "_check", lambda: True)
+    monkeypatch.setattr(db_worker, "_replica_router", lambda db_url: router)
+    monkeypatch.setattr(db_worker, "get_pool", FakePool)
+    return router
+
+
+def test_read_goes_to_replica(routed):
+    assert db_worker._read(lambda conn: conn.url, PRIMARY, replica=True) == REPLICA
+    assert db_worker._read(lambda conn: conn.url, PRIMARY, replica=False) == PRIMARY
+
+
+def test_read_falls_back_to_primary_on_replica_error(routed):
+    def run(conn):
+        if conn.url == REPLICA:
+            raise OperationalError("recovery conflict")
+        return conn.url
+
+    assert db_worker._read(run, PRIMARY, replica=True) == PRIMARY
+    assert routed.read_url() == PRIMARY
+
+
+def test_read_timeout_on_replica_is_raised(routed):
+    urls = []
+
+    def run(conn):
+        urls.append(conn.url)
+        raise QueryCanceled("canceling statement due to statement timeout")
+
+    with pytest.raises(QueryCanceled):
+        db_worker._read(run, PRIMARY, replica=True)
+    assert urls == [REPLICA]
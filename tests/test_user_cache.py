@@ -0,0 +1,79 @@
+# My Stuff
+from core import (
+    codec,
+    user_cache,
+)
+from core.models import (
+    User,
+    user_key,
+)
+from core.user_cache import (
+    UserCache,
+    missing_event_flags,
+)
+from db.redis_instance import get_redis
+
+CHAT_ID = 65310
+
+
+def test_missing_event_flags():
+    assert missing_event_flags("") == "Kghxe"
+    assert missing_event_flags("KA") == ""
+    assert missing_event_flags("Ex") == "Kghe"
+
+
+def test_own_write_with_none_fields_stays_cached(monkeypatch):
+    cache = UserCache(key_prefix="bot:user:", max_size=10, max_age=60)
+    # notifications are received, without starting the subscriber
+    monkeypatch.setattr(cache, "_start", lambda: None)
+    cache._connected.set()
+    user = User(chat_id=CHAT_ID, bot_state="COMMANDS_I")
+
+    # User.save_to_redis: HSET, HDEL of None fields, EXPIRE in one MULTI
+    version = cache.version()
+    cache.expect_own_write(CHAT_ID)
+    cache.put(user, version)
+    for event in ("hset", "hdel", "expire"):
+        cache._on_event(CHAT_ID, event)
+    assert cache.get(CHAT_ID) == user
+
+    # write of other process
+    cache._on_event(CHAT_ID, "hset")
+    assert cache.get(CHAT_ID) is None
+
+
+def test_cache_is_disabled_without_redis_settings(monkeypatch):
+    def get_redis():
+        raise ValueError("REDIS_HOST environment variable not set")
+
+    monkeypatch.setattr(user_cache, "get_redis", get_redis)
+    cache = UserCache(key_prefix="bot:user:", max_size=10, max_age=60)
+    assert not cache.enabled
+    assert cache._thread
+    cache._thread.join(timeout=5)
+    assert not cache._thread.is_alive()
+    assert not cache.enabled
+    assert cache.get(CHAT_ID) is None
+
+
+def test_cached_user_follows_updates():
+    user = User(chat_id=CHAT_ID, bot_state="COMMANDS_I")
+    user.save_to_redis()
+    assert User.get_from_redis(CHAT_ID) == user
+
+    User.update_fields(CHAT_ID, bot_state="REPORTS_O")
+    loaded = User.get_from_redis(CHAT_ID)
+    assert loaded and loaded.bot_state == "REPORTS_O"
+
+
+def test_update_fields_migrates_legacy_session():
+    redis = get_redis()
+    redis.delete(user_key(CHAT_ID))
+    legacy = User(chat_id=CHAT_ID, name="sumarokov", bot_state="COMMANDS_I")
+    redis.set(str(CHAT_ID), codec.dump_model(legacy))
+
+    User.update_fields(CHAT_ID, bot_state="REPORTS_O")
+    assert not redis.exists(str(CHAT_ID))
+    loaded = User.get_from_redis(CHAT_ID)
+    assert loaded and loaded.name == "sumarokov"
+    assert loaded.bot_state == "REPORTS_O"
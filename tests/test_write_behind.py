@@ -0,0 +1,93 @@
+# Third Party Stuff
+import pytest
+
+# My Stuff
+from core import write_behind
+from core.write_behind import UserWriteBuffer
+
+
+class IdleThread:
+    """Background flush thread that never runs, tests flush explicitly"""
+
+    def __init__(self, **kwargs) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    executed = []
+    monkeypatch.setattr(write_behind, "Thread", IdleThread)
+    monkeypatch.setattr(
+        write_behind,
+        "execute_query",
+        lambda query, args: executed.append(args),
+    )
+    return executed
+
+
+def make_row(chat_id: int, name: str = "user") -> dict:
+    return {
+        "chat_id": chat_id,
+        "name": name,
+        "full_name": name.title(),
+        "json_dump": "{}",
+    }
+
+
+def test_rows_of_the_same_user_are_coalesced(executed):
+    buffer = UserWriteBuffer(flush_interval=60, max_batch=100)
+    buffer.add(make_row(1, "old"))
+    buffer.add(make_row(2))
+    buffer.add(make_row(1, "new"))
+    buffer.flush()
+    assert executed == [
+        {
+            "chat_id_0": 1,
+            "name_0": "new",
+            "full_name_0": "New",
+            "json_dump_0": "{}",
+            "chat_id_1": 2,
+            "name_1": "user",
+            "full_name_1": "User",
+            "json_dump_1": "{}",
+        }
+    ]
+    buffer.flush()
+    assert len(executed) == 1
+
+
+def test_rows_are_written_by_chunks_of_max_batch(executed):
+    buffer = UserWriteBuffer(flush_interval=60, max_batch=2)
+    for chat_id in range(5):
+        buffer.add(make_row(chat_id))
+    buffer.flush()
+    assert [len(args) // 4 for args in executed] == [2, 2, 1]
+    assert [args["chat_id_0"] for args in executed] == [0, 2, 4]
+
+
+def test_unwritten_rows_are_requeued_on_error(monkeypatch):
+    calls = []
+    fail_at = [2]
+
+    def execute_query(query, args):
+        calls.append(args)
+        if len(calls) in fail_at:
+            raise ValueError("Database is down")
+
+    monkeypatch.setattr(write_behind, "Thread", IdleThread)
+    monkeypatch.setattr(write_behind, "execute_query", execute_query)
+    buffer = UserWriteBuffer(flush_interval=60, max_batch=2)
+    for chat_id in range(5):
+        buffer.add(make_row(chat_id))
+    with pytest.raises(ValueError, match="Database is down"):
+        buffer.flush()
+    # newer row of requeued user wins over the failed one
+    buffer.add(make_row(3, "newer"))
+    calls.clear()
+    fail_at.clear()
+    buffer.flush()
+    assert [args["chat_id_0"] for args in calls] == [2, 4]
+    assert calls[0]["name_1"] == "newer"